@@ -3,7 +3,7 @@ from django.contrib.auth import authenticate, login
 from django.utils.translation import gettext_lazy as _
 from django.contrib import messages
 from django.shortcuts import reverse
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
 
 from django.db import transaction
 from django.db.models import Count, Case, When
@@ -12,13 +12,14 @@ from django.urls import reverse_lazy
 from django.views.generic import DetailView, CreateView, FormView, ListView, UpdateView
 
 from services.check_full_name import check_name
-from services.services import AuthorizationService, ProductsViewService
+from services.object_cache import ObjectCache
+from services.recently_viewed import RecentlyViewedService
+from services.services import AuthorizationService
 from .mixins import MenuMixin
 
 from store.configs import settings
 from store.models import Offer, Orders, Product
 
-from django.core.cache import cache
 from .forms import UserUpdateForm, ProfileUpdateForm, RegisterForm, LoginForm
 
 from .models import Profile
@@ -38,11 +39,10 @@ class SellerDetail(DetailView):
         Находит профиль продавца по слагу
         """
 
-        slug = self.kwargs.get('slug')
-        instance = Profile.objects.get(slug=slug)
-        profile = cache.get_or_set(f'profile-{slug}', instance, settings.get_cache_seller())
-
-        return profile
+        try:
+            return ObjectCache(Profile, settings.get_cache_seller()).get_by(slug=self.kwargs.get('slug'))
+        except Profile.DoesNotExist:
+            raise Http404
 
     def get_context_data(self, **kwargs):
         """
@@ -95,10 +95,10 @@ class ProfileDetailView(MenuMixin, DetailView):
         Находит профиль продавца по слагу
         """
         if self.request.user.is_authenticated:
-            slug = self.kwargs.get('slug')
-            instance = Profile.objects.get(slug=slug)
-            profile = cache.get_or_set(f'profile-{slug}', instance, settings.get_cache_seller())
-            return profile
+            try:
+                return ObjectCache(Profile, settings.get_cache_seller()).get_by(slug=self.kwargs.get('slug'))
+            except Profile.DoesNotExist:
+                raise Http404
         else:
             return redirect(reverse_lazy("profile:login"))
 
@@ -207,12 +207,14 @@ class ProfileHistoryView(ListView, MenuMixin):
     template_name = 'authorization/history_view.html'
     context_object_name = 'products'
 
+    def get_queryset(self):
+        return RecentlyViewedService(self.request).get_viewed_product_list()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context.update(
             self.get_menu(id='4'),
         )
-        context['products'] = ProductsViewService(self.request).get_viewed_product_list()
 
         return context
 
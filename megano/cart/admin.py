@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 
+from services.image_variants import ImageVariantService
 from .models import Cart
 
 
@@ -34,7 +35,8 @@ class CartAdmin(admin.ModelAdmin):
         Возвращает ссылку на изображение товара в виде иконки.
         """
 
-        return mark_safe(f"<img src='{obj.products.preview.url}' width=50>")
+        url = ImageVariantService.get_url(obj.products.preview, obj.products.preview_variants, 60)
+        return mark_safe(f"<img src='{url}' width=50>")
 
     product_name.short_description = _('Товары')
     icon_image.short_description = _('Иконка')
@@ -4,8 +4,11 @@ from django.conf import settings
 
 from store.models import Product, Offer
 from services.check_count_product import CheckCountProduct
+from services.discount_engine import DiscountEngine
 
 MAX_COUNT = 21
+VERSION_KEY = 'cart-version'
+TOTAL_KEY = 'cart-total'
 
 
 class Cart(object):
@@ -65,9 +68,11 @@ class Cart(object):
 
     def save(self) -> None:
         """
-        Сохранение объекта
+        Сохранение объекта.
+        Версия корзины меняется при каждом сохранении, что сбрасывает сохраненную стоимость со скидкой
         """
 
+        self.session[VERSION_KEY] = self.session.get(VERSION_KEY, 0) + 1
         self.session.modified = True
 
     def remove(self, product: Product) -> None:
@@ -116,6 +121,26 @@ class Cart(object):
             for item in self.cart.values()
         )
 
+    def get_discount_total_price(self) -> [int, Decimal]:
+        """
+        Возвращает стоимость корзины со скидкой.
+        Стоимость сохраняется в сессии вместе с версией корзины и версией снимка скидок
+        и пересчитывается, только если одна из версий изменилась
+        """
+
+        if not self.cart:
+            return 0
+
+        version = [self.session.get(VERSION_KEY, 0), DiscountEngine.get_version()]
+        total = self.session.get(TOTAL_KEY)
+        if total is None or total['version'] != version:
+            total = self.session[TOTAL_KEY] = {
+                'version': version,
+                'price': str(DiscountEngine().get_total_price(self)),
+            }
+
+        return Decimal(total['price'])
+
     def update_date(self, offer: Offer, price: int) -> None:
         product_id = str(offer.product.id)
         self.cart[product_id]['price'] = str(price)
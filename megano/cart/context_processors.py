@@ -1,13 +1,25 @@
+from django.utils.functional import SimpleLazyObject, new_method_proxy
+
 from .cart import Cart
-from services.services import DiscountProduct
+
+
+class LazyPrice(SimpleLazyObject):
+    """
+    Ленивое значение цены, которое можно форматировать в шаблоне
+    """
+
+    __format__ = new_method_proxy(format)
 
 
 def cart(request) -> dict:
     """
-    Контекстный процессор позволяет воспользоваться переменной "cart" в любом шаблоне сайта
+    Контекстный процессор позволяет воспользоваться переменной "cart" в любом шаблоне сайта.
+    Стоимость корзины со скидкой берется из кэша в сессии и пересчитывается,
+    только если изменилась корзина или версия скидок.
+    Корзина и стоимость создаются при первом обращении из шаблона
     """
 
-    cart = Cart(request)
+    cart = SimpleLazyObject(lambda: Cart(request))
 
     return {'cart': cart,
-            'total_price': DiscountProduct().get_priority_discount(cart)}
+            'total_price': LazyPrice(lambda: cart.get_discount_total_price())}
@@ -2,7 +2,6 @@ from django.shortcuts import get_object_or_404, redirect
 from django.http import HttpResponseRedirect
 from django.views.generic import TemplateView
 
-from services.services import DiscountProduct
 from .cart import Cart
 from store.models import Product, Offer
 
@@ -14,12 +13,12 @@ class CartListView(TemplateView):
 
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        discount = DiscountProduct()
+        cart = Cart(self.request)
         context.update(
             {
-                'carts': Cart(self.request),
+                'carts': cart,
                 'offers': Offer.objects.all(),
-                'total_price': discount.get_priority_discount(cart=Cart(self.request))
+                'total_price': cart.get_discount_total_price()
             }
         )
         return context
@@ -0,0 +1,212 @@
+from typing import Iterable
+
+from django.conf import settings as django_settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.utils.translation import get_language, gettext_lazy as _
+
+from compare.models import (AbstractCharacteristicModel,
+                            HeadphonesCharacteristic,
+                            TVSetCharacteristic,
+                            WashMachineCharacteristic,
+                            MobileCharacteristic,
+                            PhotoCamCharacteristic,
+                            NotebookCharacteristic,
+                            KitchenCharacteristic,
+                            TorchereCharacteristic,
+                            ElectroCharacteristic,
+                            MicrowaveOvenCharacteristic,
+                            )
+from store.configs import settings
+from store.models import Product
+
+"""
+Реестр характеристик товаров: какая модель характеристик соответствует категории
+и какие поля модели выводятся на фронт
+"""
+
+COMMON_FIELDS = {
+    _('Страна производства'): 'made_in',
+    _('Год производства'): 'production_year',
+    _('Цвет'): 'color',
+    _('Вес'): 'weight',
+}
+
+
+class CharacteristicRegistry:
+    """
+    Реестр моделей характеристик по названиям категорий (в нижнем регистре, на русском языке)
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._fields = {}
+
+    def register(self, category_name: str, model: type[AbstractCharacteristicModel], fields: dict) -> None:
+        """
+        Регистрирует модель характеристик категории
+
+        :param category_name: название категории
+        :param model: модель характеристик
+        :param fields: {подпись: имя поля модели} для вывода на фронт
+        """
+
+        self._models[category_name.lower()] = model
+        self._fields[model] = fields
+
+    def get_model(self, category) -> type[AbstractCharacteristicModel] | None:
+        """
+        Возвращает модель характеристик для категории (объекта Category или названия)
+        """
+
+        if not isinstance(category, str):
+            category = getattr(category, 'name_ru', None) or category.name
+
+        return self._models.get(category.lower())
+
+    def get_models(self) -> list[type[AbstractCharacteristicModel]]:
+        return list(self._fields)
+
+    def get_characteristics(self, products: Iterable) -> dict[int, dict]:
+        """
+        Возвращает характеристики товаров для вывода на фронт: {id товара: характеристики}.
+        Товары группируются по моделям характеристик, на каждую модель выполняется один запрос,
+        результат кэшируется по товару и языку. У товара без характеристик - пустой словарь.
+        Товарам должна быть подгружена категория (select_related('category')).
+        """
+
+        products = list(products)
+        language = get_language()
+        keys = {self._cache_key(product.id, language): product for product in products}
+        result = {keys[key].id: value for key, value in cache.get_many(keys).items()}
+
+        by_model = {}
+        for product in products:
+            if product.id not in result:
+                model = self.get_model(product.category) or AbstractCharacteristicModel
+                by_model.setdefault(model, set()).add(product.id)
+
+        if not by_model:
+            return result
+
+        content_type = ContentType.objects.get_for_model(Product)
+        loaded = {}
+        for model, product_ids in by_model.items():
+            for instance in model.objects.filter(content_type=content_type, object_id__in=product_ids):
+                loaded.setdefault(instance.object_id, self.get_display(instance))
+
+            for product_id in product_ids:
+                loaded.setdefault(product_id, {})
+
+        cache.set_many(
+            {self._cache_key(product_id, language): value for product_id, value in loaded.items()},
+            settings.get_cache_product_detail(),
+        )
+        result.update(loaded)
+
+        return result
+
+    def invalidate(self, product_ids: Iterable[int]) -> None:
+        """
+        Удаляет из кэша характеристики переданных товаров на всех языках
+        """
+
+        languages = {code for code, _name in django_settings.LANGUAGES} | {django_settings.LANGUAGE_CODE}
+        cache.delete_many([
+            self._cache_key(product_id, language)
+            for product_id in set(product_ids)
+            for language in languages
+        ])
+
+    @staticmethod
+    def _cache_key(product_id: int, language: str) -> str:
+        return f'characteristics-{language}-{product_id}'
+
+    def get_display(self, instance: AbstractCharacteristicModel) -> dict:
+        """
+        Возвращает характеристики для вывода на фронт:
+        {'characteristics': общие характеристики, 'product_characteristic_list': характеристики модели}
+        """
+
+        return {
+            'characteristics': {
+                str(label): getattr(instance, field) for label, field in COMMON_FIELDS.items()
+            },
+            'product_characteristic_list': {
+                str(label): getattr(instance, field) for label, field in self._fields.get(type(instance), {}).items()
+            },
+        }
+
+
+registry = CharacteristicRegistry()
+
+registry.register('наушники', HeadphonesCharacteristic, {
+    _('Беспроводные'): 'wireless',
+    _('Наличие микрофона'): 'mic',
+    _('Ношение'): 'fit',
+    _('Наличие bluetooth'): 'bluetooth',
+    _('Сомпротивление, Ом'): 'resistance',
+    _('Наличие HDMI'): 'hdmi',
+})
+registry.register('телевизоры', TVSetCharacteristic, {
+    _('Название'): 'name',
+    _('Размер экрана'): 'screen',
+    _('Разрешение экрана'): 'resolution',
+    _('Страна производитель'): 'country',
+    _('Частота обновления'): 'freq',
+    _('Наличие Wi - Fi'): 'wi_fi',
+    _('HDMI'): 'hdmi',
+    _('Дополнительное описание'): 'description',
+})
+registry.register('мобильные телефоны', MobileCharacteristic, {
+    _('Тип мобильного телефона'): 'phone_type',
+    _('Размер экрана в дюймах'): 'screen_size',
+    _('Разрешение экрана'): 'screen_resolution',
+    _('Технология экрана'): 'screen_technology',
+    _('Операционная система'): 'op_system',
+})
+registry.register('стиральные машины', WashMachineCharacteristic, {
+    _('Высота'): 'height',
+    _('Ширина'): 'width',
+    _('Глубина'): 'depth',
+    _('Тип загрузки'): 'type_loading',
+    _('Объём загрузки'): 'capacity',
+    _('Дополнительное описание'): 'description',
+})
+registry.register('фотоаппараты', PhotoCamCharacteristic, {
+    _('Тип фотоаппарата'): 'type',
+    _('Количество мегапикселей'): 'mp',
+    _('ISO максимальная'): 'max_iso',
+    _('ISO минимальная'): 'min_iso',
+    _('Видео разрешение'): 'video_resolution',
+})
+registry.register('ноутбуки', NotebookCharacteristic, {
+    _('Тип ноутбука'): 'laptop_type',
+    _('Размер экрана в дюймах'): 'screen_size',
+    _('Разрешение экрана'): 'screen_resolution',
+    _('Плотность пикселей'): 'ppi',
+    _('Операционная система'): 'op_system',
+    _('Версия операционной системы'): 'op_version',
+})
+registry.register('электроника', ElectroCharacteristic, {
+    _('Тип электроники'): 'type_product',
+    _('Тип питания'): 'power',
+    _('Дополнительное описание'): 'description',
+})
+registry.register('микроволновые печи', MicrowaveOvenCharacteristic, {
+    _('Объём загрузки'): 'capacity',
+    _('Мощность Вт'): 'power',
+    _('Гриль'): 'grill',
+    _('Высота, мм'): 'height',
+    _('Ширина, мм'): 'width',
+    _('Глубина, мм'): 'depth',
+})
+registry.register('кухонная техника', KitchenCharacteristic, {
+    _('Тип техники'): 'type',
+    _('Дополнительное описание'): 'description',
+})
+registry.register('торшеры', TorchereCharacteristic, {
+    _('Тип лампочки'): 'led_type',
+    _('Высота'): 'height',
+    _('Место расположения'): 'place_type',
+})
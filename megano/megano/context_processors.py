@@ -2,4 +2,4 @@ from store.models import Category
 
 
 def get_static_template_category(request):
-    return {'static_template_category': Category.objects.all()}
+    return {'static_template_category': Category.objects.select_related('price_stats')}
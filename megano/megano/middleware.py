@@ -0,0 +1,35 @@
+import random
+
+from django.conf import settings
+from django.db import connection
+
+from services.query_budget import QueryBudget, QueryBudgetService, current_budget
+
+
+class QueryBudgetMiddleware:
+    """
+    Замеряет запросы к базе и обращения к кэшу для доли запросов QUERY_BUDGET_SAMPLE_RATE.
+    Результат отдается в заголовке X-Query-Budget и добавляется в сводку по вьюшкам на странице настроек.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.QUERY_BUDGET_SAMPLE_RATE:
+            return self.get_response(request)
+
+        budget = QueryBudget()
+        token = current_budget.set(budget)
+        try:
+            with connection.execute_wrapper(budget):
+                response = self.get_response(request)
+        finally:
+            current_budget.reset(token)
+
+        response['X-Query-Budget'] = budget.get_header()
+
+        if request.resolver_match is not None:
+            QueryBudgetService().add_sample(request.resolver_match.view_name, budget)
+
+        return response
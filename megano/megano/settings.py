@@ -50,7 +50,7 @@ DATABASES = {
 CACHE_ROOT = os.path.join(BASE_DIR, "cache")
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "BACKEND": "services.query_budget.InstrumentedFileBasedCache",
         "LOCATION": CACHE_ROOT,
     }
 }
@@ -63,6 +63,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django.forms',
     'store.apps.StoreConfig',
     'cart.apps.CartConfig',
@@ -77,6 +78,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'megano.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -89,6 +91,8 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'megano.urls'
 
+QUERY_BUDGET_SAMPLE_RATE = float(os.getenv('QUERY_BUDGET_SAMPLE_RATE', 0.01))
+
 FORM_RENDERER = 'django.forms.renderers.TemplatesSetting'
 
 TEMPLATES = [
@@ -192,3 +196,20 @@ REDIS_NAME = os.getenv('REDIS_NAME')
 
 CELERY_BROKER_URL = f'redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_NAME}'
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
+CELERY_BEAT_SCHEDULE = {
+    'recompute-popular-tags': {
+        'task': 'store.tasks.recompute_popular_tags',
+        'schedule': 60 * 60,
+        'options': {'queue': 'periodic'},
+    },
+    'rebuild-related-products': {
+        'task': 'store.tasks.rebuild_related_products',
+        'schedule': 60 * 60 * 24,
+        'options': {'queue': 'periodic'},
+    },
+    'apply-discount-schedule': {
+        'task': 'store.tasks.apply_discount_schedule',
+        'schedule': 60,
+        'options': {'queue': 'periodic'},
+    },
+}
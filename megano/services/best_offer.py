@@ -0,0 +1,125 @@
+from decimal import Decimal
+from typing import Iterable
+
+from django.core.cache import cache
+
+from store.configs import settings
+from store.models import Offer
+
+
+class BestOfferService:
+    """
+    Сервис выбора лучшего предложения товара.
+    Для каждого товара в кэше хранится список предложений, отсортированный по наличию и цене:
+    сначала предложения в наличии от дешевых к дорогим, затем распроданные.
+    Список обновляется сигналами точечно по измененному предложению (в том числе при списании остатков),
+    поэтому корзина и страницы со списками товаров получают предложение из кэша без запроса к базе.
+    """
+
+    OFFER_FIELDS = ['id', 'product_id', 'seller_id', 'unit_price', 'amount']
+
+    @staticmethod
+    def _key(product_id: int) -> str:
+        return f'best-offers-{product_id}'
+
+    @staticmethod
+    def _rank(offer: dict) -> tuple:
+        return offer['amount'] == 0, offer['unit_price'], offer['id']
+
+    def get_ranked(self, product_id: int) -> list[dict]:
+        """
+        Возвращает предложения товара, отсортированные по наличию и цене
+        """
+
+        return self.get_ranked_many([product_id])[product_id]
+
+    def get_ranked_many(self, product_ids: Iterable[int]) -> dict[int, list[dict]]:
+        """
+        Возвращает отсортированные предложения для нескольких товаров: {id товара: предложения}.
+        Отсутствующие в кэше списки загружаются одним запросом.
+        """
+
+        keys = {self._key(product_id): product_id for product_id in set(product_ids)}
+        result = {keys[key]: offers for key, offers in cache.get_many(keys).items()}
+
+        missing = {product_id: [] for product_id in keys.values() if product_id not in result}
+        if missing:
+            for offer in Offer.objects.filter(product_id__in=missing).values(*self.OFFER_FIELDS).order_by():
+                missing[offer['product_id']].append(offer)
+
+            for offers in missing.values():
+                offers.sort(key=self._rank)
+
+            cache.set_many(
+                {self._key(product_id): offers for product_id, offers in missing.items()},
+                settings.get_cache_product_detail(),
+            )
+            result.update(missing)
+
+        return result
+
+    def get_best(self, product_id: int) -> dict | None:
+        """
+        Возвращает самое дешевое предложение товара в наличии или None
+        """
+
+        return self._best(self.get_ranked(product_id))
+
+    def get_best_many(self, product_ids: Iterable[int]) -> dict[int, dict | None]:
+        """
+        Возвращает лучшие предложения для нескольких товаров: {id товара: предложение или None}
+        """
+
+        return {product_id: self._best(offers) for product_id, offers in self.get_ranked_many(product_ids).items()}
+
+    def attach(self, products: Iterable) -> None:
+        """
+        Добавляет товарам атрибуты ranked_offers (отсортированные предложения) и best_offer (лучшее предложение)
+        """
+
+        products = list(products)
+        ranked = self.get_ranked_many(product.id for product in products)
+
+        for product in products:
+            product.ranked_offers = ranked[product.id]
+            product.best_offer = self._best(product.ranked_offers)
+
+    def update(self, offer: Offer) -> None:
+        """
+        Обновляет предложение в отсортированном списке товара, если список есть в кэше
+        """
+
+        key = self._key(offer.product_id)
+        offers = cache.get(key)
+        if offers is None:
+            return
+
+        offers = [item for item in offers if item['id'] != offer.id]
+        offers.append({
+            'id': offer.id,
+            'product_id': offer.product_id,
+            'seller_id': offer.seller_id,
+            'unit_price': Decimal(str(offer.unit_price)),
+            'amount': int(offer.amount),
+        })
+        offers.sort(key=self._rank)
+        cache.set(key, offers, settings.get_cache_product_detail())
+
+    def remove(self, offer: Offer) -> None:
+        """
+        Удаляет предложение из отсортированного списка товара, если список есть в кэше
+        """
+
+        key = self._key(offer.product_id)
+        offers = cache.get(key)
+        if offers is None:
+            return
+
+        cache.set(key, [item for item in offers if item['id'] != offer.id], settings.get_cache_product_detail())
+
+    @staticmethod
+    def _best(offers: list[dict]) -> dict | None:
+        if offers and offers[0]['amount'] > 0:
+            return offers[0]
+
+        return None
@@ -0,0 +1,36 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+
+
+class CacheVersion:
+    """
+    Версии кэшированных данных.
+    Версия - случайный токен, а не счетчик: если ключ версии будет вытеснен из кэша,
+    новая версия не совпадет ни с одной прежней и старые записи не станут снова действительными.
+    """
+
+    @staticmethod
+    def get(key: str) -> str:
+        """
+        Возвращает текущую версию, создавая новую, если ключа версии нет в кэше
+        """
+
+        version = cache.get(key)
+        if version is None:
+            version = uuid4().hex
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+
+        return version
+
+    @staticmethod
+    def bump(key: str) -> str:
+        """
+        Заменяет версию новой, после чего записи под прежней версией считаются устаревшими
+        """
+
+        version = uuid4().hex
+        cache.set(key, version, None)
+
+        return version
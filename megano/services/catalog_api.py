@@ -0,0 +1,94 @@
+import hashlib
+import json
+from decimal import Decimal
+
+from django.http import HttpRequest
+from django.utils.translation import get_language
+
+from store.models import Product
+from .catalog_cache import CatalogCache
+from .discount_engine import DiscountEngine
+from .image_variants import ImageVariantService
+
+CARD_IMAGE_WIDTH = 250
+
+
+class CatalogApiService:
+    """
+    Сервис JSON API каталога.
+    Формирует компактные карточки товаров и ETag ответа по версии каталога, параметрам запроса и языку.
+    """
+
+    CARD_PRICE_PRECISION = Decimal('0.01')
+
+    @staticmethod
+    def get_etag(request: HttpRequest, category_slug: str = None) -> str:
+        """
+        Возвращает ETag ответа. Версия каталога меняется при изменении товаров, предложений, скидок,
+        отзывов и заказов, поэтому пока данные не изменились, повторный запрос получает 304 Not Modified без обращения к базе.
+        """
+
+        raw_etag = json.dumps(
+            {
+                'params': sorted((name, sorted(values)) for name, values in request.GET.lists()),
+                'category': category_slug,
+                'language': get_language(),
+                'version': CatalogCache.get_version(),
+            },
+            sort_keys=True,
+        )
+
+        return hashlib.sha1(raw_etag.encode()).hexdigest()
+
+    def get_cards(self, request: HttpRequest, products: list[Product]) -> list[dict]:
+        """
+        Возвращает карточки товаров.
+        Цены берутся из таблицы агрегатов, скидки берутся из снимка скидок DiscountEngine.
+        """
+
+        discounts = DiscountEngine().get_product_discounts(products)
+        cards = []
+
+        for product in products:
+            stats = getattr(product, 'stats', None)
+            min_price = stats.min_price if stats else None
+            avg_price = stats.avg_price if stats else None
+
+            cards.append({
+                'id': product.id,
+                'slug': product.slug,
+                'name': product.name,
+                'preview': self._preview(request, product),
+                'preview_srcset': ImageVariantService.get_srcset(product.preview, product.preview_variants, 'webp'),
+                'min_price': self._price(min_price),
+                'avg_price': self._price(avg_price),
+                'discount_price': self._discount_price(avg_price, discounts.get(product.id)),
+                'availability': product.availability,
+            })
+
+        return cards
+
+    @staticmethod
+    def _preview(request: HttpRequest, product: Product) -> str | None:
+        """
+        Возвращает url копии основного фото под размер карточки
+        """
+
+        if not product.preview:
+            return None
+
+        return request.build_absolute_uri(
+            ImageVariantService.get_url(product.preview, product.preview_variants, CARD_IMAGE_WIDTH)
+        )
+
+    def _discount_price(self, price: Decimal | None, sum_discount: float | None) -> str | None:
+        if price is None or sum_discount is None or not 1 <= sum_discount <= 99:
+            return None
+
+        return self._price(price - price * Decimal(sum_discount / 100))
+
+    def _price(self, price: Decimal | None) -> str | None:
+        if price is None:
+            return None
+
+        return str(price.quantize(self.CARD_PRICE_PRECISION))
@@ -0,0 +1,137 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.utils.translation import get_language
+
+from store.configs import settings
+from store.models import Product
+from .cache_version import CacheVersion
+
+MAX_ENTRIES = 500
+
+
+class CatalogCache:
+    """
+    Кэш результатов каталога.
+    Ключ строится из отсортированных GET параметров, слага категории, языка и версии каталога.
+    В кэше хранится только упорядоченный список id товаров и их количество.
+    Версия каталога меняется при изменении товаров, предложений, скидок, отзывов и заказов,
+    что делает старые ключи недоступными.
+    """
+
+    VERSION_KEY = 'catalog-version'
+    INDEX_KEY = 'catalog-keys'
+    IGNORED_PARAMS = ('page', 'csrfmiddlewaretoken', 'search')
+
+    def __init__(self, request: HttpRequest, category_slug: str = None):
+        self._key = self._make_key(request, category_slug)
+
+    @classmethod
+    def get_version(cls) -> str:
+        """
+        Возвращает текущую версию каталога
+        """
+
+        return CacheVersion.get(cls.VERSION_KEY)
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """
+        Меняет версию каталога, после чего все сохраненные результаты считаются устаревшими
+        """
+
+        CacheVersion.bump(cls.VERSION_KEY)
+
+    def get(self) -> dict | None:
+        """
+        Возвращает сохраненный результат: {'ids': [...], 'count': int}
+        """
+
+        return cache.get(self._key)
+
+    def set(self, product_ids: list[int]) -> dict:
+        """
+        Сохраняет упорядоченный список id товаров.
+        Если количество сохраненных результатов превышает MAX_ENTRIES - удаляет самые старые.
+        """
+
+        entry = {
+            'ids': product_ids,
+            'count': len(product_ids),
+        }
+        cache.set(self._key, entry, settings.get_cache_catalog())
+
+        keys = cache.get(self.INDEX_KEY, [])
+        if self._key in keys:
+            keys.remove(self._key)
+        keys.append(self._key)
+
+        if len(keys) > MAX_ENTRIES:
+            cache.delete_many(keys[:-MAX_ENTRIES])
+            keys = keys[-MAX_ENTRIES:]
+
+        cache.set(self.INDEX_KEY, keys, None)
+
+        return entry
+
+    def set_facets(self, entry: dict, facets: dict) -> dict:
+        """
+        Добавляет фасеты к сохраненному результату, чтобы они жили и устаревали вместе со списком товаров
+        """
+
+        entry['facets'] = facets
+        cache.set(self._key, entry, settings.get_cache_catalog())
+
+        return entry
+
+    def _make_key(self, request: HttpRequest, category_slug: str = None) -> str:
+        """
+        Строит ключ кэша из канонического представления параметров запроса
+        """
+
+        params = sorted(
+            (name, sorted(values))
+            for name, values in request.GET.lists()
+            if name not in self.IGNORED_PARAMS
+        )
+        raw_key = json.dumps(
+            {
+                'params': params,
+                'category': category_slug,
+                'language': get_language(),
+                'version': self.get_version(),
+            },
+            sort_keys=True,
+        )
+
+        return f'catalog-{hashlib.sha1(raw_key.encode()).hexdigest()}'
+
+
+class CachedProductList:
+    """
+    Ленивый список товаров по сохраненному списку id.
+    Пагинатор получает количество без запроса COUNT(*), а товары загружаются только для текущей страницы.
+    """
+
+    model = Product
+
+    def __init__(self, product_ids: list[int], queryset=None):
+        self._product_ids = product_ids
+        self._queryset = queryset if queryset is not None else Product.objects.all()
+
+    def count(self) -> int:
+        return len(self._product_ids)
+
+    def __len__(self) -> int:
+        return len(self._product_ids)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            page_ids = self._product_ids[item]
+            products = self._queryset.in_bulk(page_ids)
+
+            return [products[product_id] for product_id in page_ids if product_id in products]
+
+        return self._queryset.get(id=self._product_ids[item])
@@ -0,0 +1,80 @@
+from functools import reduce
+from operator import or_
+from typing import Iterable
+
+from django.db.models import Max, Min, OuterRef, Q, Subquery
+
+from store.models import Category, CategoryPriceStats, Product, ProductStats
+
+
+class CategoryPriceService:
+    """
+    Сервис цен категорий.
+    Для каждой категории хранятся минимальная и максимальная цена товаров ее поддерева.
+    Цены считаются по таблице агрегатов товаров с отбором поддерева по tree_id и lft категории товара,
+    поэтому предложения не читаются. При изменении цен товара пересчитываются только его категория
+    и ее предки - поддеревья, в которые входит товар.
+    """
+
+    STATS_FIELDS = ['min_price', 'max_price', 'updated_at']
+
+    def refresh_products(self, product_ids: Iterable[int]) -> None:
+        """
+        Пересчитывает цены категорий переданных товаров и всех их предков
+        """
+
+        category_ids = set(Product.objects.filter(id__in=set(product_ids)).values_list('category_id', flat=True))
+        self.refresh_categories(category_ids)
+
+    def refresh_categories(self, category_ids: Iterable[int]) -> None:
+        """
+        Пересчитывает цены переданных категорий и всех их предков
+        """
+
+        categories = Category.objects.filter(id__in=set(category_ids)).values('tree_id', 'lft', 'rght')
+        conditions = [
+            Q(tree_id=category['tree_id'], lft__lte=category['lft'], rght__gte=category['rght'])
+            for category in categories
+        ]
+        if not conditions:
+            return
+
+        self._refresh(Category.objects.filter(reduce(or_, conditions)))
+
+    def rebuild(self) -> int:
+        """
+        Пересчитывает цены всех категорий
+
+        :return: количество обработанных категорий
+        """
+
+        return self._refresh(Category.objects.all())
+
+    def _refresh(self, categories) -> int:
+        """
+        Считает цены поддеревьев категорий одним запросом и сохраняет их
+        """
+
+        subtree_stats = ProductStats.objects.filter(
+            product__category_tree_id=OuterRef('tree_id'),
+            product__category_lft__gte=OuterRef('lft'),
+            product__category_lft__lt=OuterRef('rght'),
+        ).order_by().values('product__category_tree_id')
+
+        rows = categories.order_by().annotate(
+            subtree_min_price=Subquery(subtree_stats.annotate(price=Min('min_price')).values('price')),
+            subtree_max_price=Subquery(subtree_stats.annotate(price=Max('max_price')).values('price')),
+        ).values_list('id', 'subtree_min_price', 'subtree_max_price')
+
+        stats = [
+            CategoryPriceStats(category_id=category_id, min_price=min_price, max_price=max_price)
+            for category_id, min_price, max_price in rows
+        ]
+        CategoryPriceStats.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=['category'],
+            update_fields=self.STATS_FIELDS,
+        )
+
+        return len(stats)
@@ -0,0 +1,94 @@
+from django.core.cache import cache
+from django.db.models import F, OuterRef, Q, QuerySet, Subquery
+from django.http import Http404
+
+from store.models import Category, Product
+from .cache_version import CacheVersion
+
+
+class CategoryTreeService:
+    """
+    Сервис работы с деревом категорий.
+    Границы поддерева категории (tree_id, lft, rght) и id ее потомков хранятся в кэше с версией дерева,
+    версия меняется при любом изменении категорий.
+    У товара хранятся tree_id и lft его категории, поэтому отбор товаров поддерева - одно условие по индексу.
+    """
+
+    VERSION_KEY = 'category-tree-version'
+
+    @classmethod
+    def get_version(cls) -> str:
+        """
+        Возвращает текущую версию дерева категорий
+        """
+
+        return CacheVersion.get(cls.VERSION_KEY)
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """
+        Меняет версию дерева категорий, после чего сохраненные границы поддеревьев считаются устаревшими
+        """
+
+        CacheVersion.bump(cls.VERSION_KEY)
+
+    def get_subtree(self, category_slug: str) -> dict:
+        """
+        Возвращает границы поддерева категории: {'id', 'tree_id', 'lft', 'rght', 'descendants'}
+
+        :raises Http404: если категория не найдена
+        """
+
+        key = f'category-subtree-{self.get_version()}-{category_slug}'
+        subtree = cache.get(key)
+
+        if subtree is None:
+            try:
+                category = Category.objects.get(slug=category_slug)
+            except Category.DoesNotExist:
+                raise Http404
+
+            subtree = {
+                'id': category.id,
+                'tree_id': category.tree_id,
+                'lft': category.lft,
+                'rght': category.rght,
+                'descendants': list(category.get_descendants(include_self=True).values_list('id', flat=True)),
+            }
+            cache.set(key, subtree, None)
+
+        return subtree
+
+    def filter_products(self, queryset: QuerySet, category_slug: str) -> QuerySet:
+        """
+        Отбирает товары поддерева категории без обращения к таблице категорий
+        """
+
+        subtree = self.get_subtree(category_slug)
+
+        return queryset.filter(
+            category_tree_id=subtree['tree_id'],
+            category_lft__gte=subtree['lft'],
+            category_lft__lt=subtree['rght'],
+        )
+
+    @staticmethod
+    def sync_products() -> int:
+        """
+        Обновляет положение категории в дереве у товаров, для которых оно устарело
+        (после добавления, перемещения или удаления категорий)
+
+        :return: количество обновленных товаров
+        """
+
+        categories = Category.objects.filter(id=OuterRef('category_id'))
+
+        return Product.objects.filter(
+            Q(category_tree_id__isnull=True)
+            | Q(category_lft__isnull=True)
+            | ~Q(category_tree_id=F('category__tree_id'))
+            | ~Q(category_lft=F('category__lft'))
+        ).update(
+            category_tree_id=Subquery(categories.values('tree_id')[:1]),
+            category_lft=Subquery(categories.values('lft')[:1]),
+        )
@@ -0,0 +1,267 @@
+from decimal import Decimal
+from typing import Iterable
+
+from django.core.cache import cache
+
+from store.models import Category, Discount, Product
+from .cache_version import CacheVersion
+
+SNAPSHOT_TIMEOUT = 60 * 60
+
+_local_snapshot = {}
+
+
+class DiscountEngine:
+    """
+    Движок расчета скидок корзины по скомпилированному снимку активных скидок.
+    Снимок содержит скидки на корзину (DC) и наборы (DS) в порядке применения, а также индексы
+    скидок на товар (DP) по id товара и id категории. Снимок собирается тремя запросами только после
+    изменения скидок (версия меняется сигналами), хранится в кэше и в памяти процесса,
+    поэтому корзина любого размера считается без запросов к базе за скидками.
+    """
+
+    VERSION_KEY = 'discount-snapshot-version'
+
+    @classmethod
+    def get_version(cls) -> str:
+        return CacheVersion.get(cls.VERSION_KEY)
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """
+        Меняет версию снимка скидок
+        """
+
+        CacheVersion.bump(cls.VERSION_KEY)
+
+    def get_snapshot(self) -> dict:
+        """
+        Возвращает снимок активных скидок текущей версии
+        """
+
+        version = self.get_version()
+        if _local_snapshot.get('version') == version:
+            return _local_snapshot['snapshot']
+
+        key = f'discount-snapshot-{version}'
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = self.compile()
+            cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+
+        _local_snapshot.update({'version': version, 'snapshot': snapshot})
+
+        return snapshot
+
+    @staticmethod
+    def compile() -> dict:
+        """
+        Собирает снимок активных скидок:
+        cart_priority, cart - скидки DC с приоритетом и без в порядке Discount.Meta.ordering;
+        set_priority, set - индексы скидок DS с приоритетом и без (см. _index_sets);
+        product_dp, category_dp - максимальная скидка DP по id товара и id категории
+        """
+
+        discounts = list(
+            Discount.objects.filter(is_active=True, name__in=['DC', 'DS']).values(
+                'id', 'name', 'priority', 'sum_discount', 'total_products', 'sum_cart',
+            )
+        )
+        set_ids = [discount['id'] for discount in discounts if discount['name'] == 'DS']
+
+        set_products, set_categories = {}, {}
+        for discount_id, product_id in Product.discount.through.objects.filter(
+                discount_id__in=set_ids).values_list('discount_id', 'product_id'):
+            set_products.setdefault(discount_id, set()).add(product_id)
+        for discount_id, category_id in Category.discount.through.objects.filter(
+                discount_id__in=set_ids).values_list('discount_id', 'category_id'):
+            set_categories.setdefault(discount_id, set()).add(category_id)
+
+        snapshot = {'cart_priority': [], 'set_priority': [], 'cart': [], 'set': []}
+        for discount in discounts:
+            if discount['name'] == 'DC':
+                rule = (discount['total_products'], discount['sum_cart'], discount['sum_discount'])
+                snapshot['cart_priority' if discount['priority'] else 'cart'].append(rule)
+            else:
+                rule = (
+                    frozenset(set_products.get(discount['id'], ())),
+                    frozenset(set_categories.get(discount['id'], ())),
+                    discount['sum_discount'],
+                )
+                snapshot['set_priority' if discount['priority'] else 'set'].append(rule)
+
+        snapshot['set_priority'] = DiscountEngine._index_sets(snapshot['set_priority'])
+        snapshot['set'] = DiscountEngine._index_sets(snapshot['set'])
+
+        snapshot['product_dp'] = DiscountEngine._get_dp_index(Product.discount.through, 'product_id')
+        snapshot['category_dp'] = DiscountEngine._get_dp_index(Category.discount.through, 'category_id')
+
+        return snapshot
+
+    @staticmethod
+    def _index_sets(rules: list[tuple]) -> dict | None:
+        """
+        Строит обратный индекс скидок на наборы:
+        rules - наборы (товары, категории, сумма скидки);
+        by_product, by_category - номера наборов, в которые входит товар или категория;
+        unconditional - номера наборов без товаров и категорий
+        """
+
+        if not rules:
+            return None
+
+        index = {'rules': rules, 'by_product': {}, 'by_category': {}, 'unconditional': []}
+        for number, (products, categories, _) in enumerate(rules):
+            for product_id in products:
+                index['by_product'].setdefault(product_id, []).append(number)
+            for category_id in categories:
+                index['by_category'].setdefault(category_id, []).append(number)
+            if not products and not categories:
+                index['unconditional'].append(number)
+
+        return index
+
+    @staticmethod
+    def _get_dp_index(through, field: str) -> dict[int, float]:
+        index = {}
+        for object_id, sum_discount in through.objects.filter(
+                discount__name='DP', discount__is_active=True).values_list(field, 'discount__sum_discount'):
+            index[object_id] = max(sum_discount, index.get(object_id, sum_discount))
+
+        return index
+
+    def get_product_discounts(self, products: Iterable[Product]) -> dict[int, float | None]:
+        """
+        Возвращает размер скидки на товар (DP) с учетом скидки на категорию товара, как в Product.get_discount_price
+        """
+
+        snapshot = self.get_snapshot()
+
+        return {
+            product.id: snapshot['product_dp'].get(product.id, snapshot['category_dp'].get(product.category_id))
+            for product in products
+        }
+
+    def get_total_price(self, lines: Iterable[dict]):
+        """
+        Возвращает стоимость корзины со скидкой.
+        Порядок применения: скидки на корзину с приоритетом, затем на наборы с приоритетом,
+        затем без приоритета; если подходящей скидки нет - скидки на товары.
+
+        :param lines: строки корзины (product, price, quantity, total_price)
+        """
+
+        lines = list(lines)
+        snapshot = self.get_snapshot()
+
+        if snapshot['cart_priority']:
+            price = self._apply_cart(snapshot['cart_priority'], lines)
+        elif snapshot['set_priority']:
+            price = self._apply_set(snapshot['set_priority'], lines)
+        elif snapshot['cart']:
+            price = self._apply_cart(snapshot['cart'], lines)
+        elif snapshot['set']:
+            price = self._apply_set(snapshot['set'], lines)
+        else:
+            price = None
+
+        if price:
+            return price
+
+        return self._apply_products(lines)
+
+    @staticmethod
+    def _total(lines: list[dict]) -> Decimal:
+        return sum((line['price'] * line['quantity'] for line in lines), Decimal(0))
+
+    def _apply_cart(self, rules: list[tuple], lines: list[dict]):
+        """
+        Скидка на корзину: количество товаров совпадает и сумма корзины не меньше заданной
+        """
+
+        total_products = sum(line['quantity'] for line in lines)
+        total_price = self._total(lines)
+        for rule_total_products, sum_cart, sum_discount in rules:
+            if rule_total_products == total_products and sum_cart <= total_price and sum_discount >= 1:
+                return sum_discount
+
+        return None
+
+    def _apply_set(self, index: dict, lines: list[dict]):
+        """
+        Скидка на набор: из корзины можно собрать набор, каждая единица товара входит в набор один раз.
+        Кандидаты находятся по обратному индексу товаров и категорий корзины, поэтому время подбора
+        зависит от размера корзины и подходящих наборов, а не от общего количества наборов.
+        Из подходящих наборов выбирается набор с наибольшей скидкой.
+        """
+
+        if not lines:
+            return None
+
+        product_categories, category_quantities = {}, {}
+        for line in lines:
+            product = line['product']
+            product_categories[product.id] = product.category_id
+            category_quantities[product.category_id] = (
+                category_quantities.get(product.category_id, 0) + line['quantity']
+            )
+
+        hits = dict.fromkeys(index['unconditional'], 0)
+        for product_id in product_categories:
+            for number in index['by_product'].get(product_id, ()):
+                hits[number] = hits.get(number, 0) + 1
+        for category_id in category_quantities:
+            for number in index['by_category'].get(category_id, ()):
+                hits[number] = hits.get(number, 0) + 1
+
+        best = None
+        for number in hits:
+            rule_products, rule_categories, sum_discount = index['rules'][number]
+            if hits[number] != len(rule_products) + len(rule_categories):
+                continue
+            if not self._is_set_assembled(rule_products, rule_categories, product_categories, category_quantities):
+                continue
+            if best is None or sum_discount > best:
+                best = sum_discount
+
+        if best is None:
+            return None
+
+        price = self._total(lines) - Decimal(best)
+
+        return 1 if price <= 1 else price
+
+    @staticmethod
+    def _is_set_assembled(rule_products: frozenset, rule_categories: frozenset, product_categories: dict,
+                          category_quantities: dict) -> bool:
+        """
+        Проверяет, что после выделения товаров набора в каждой категории набора остается хотя бы одна единица товара
+        """
+
+        reserved = {}
+        for product_id in rule_products:
+            category_id = product_categories[product_id]
+            if category_id in rule_categories:
+                reserved[category_id] = reserved.get(category_id, 0) + 1
+
+        return all(category_quantities[category_id] > reserved.get(category_id, 0) for category_id in rule_categories)
+
+    def _apply_products(self, lines: list[dict]) -> int:
+        """
+        Скидка на товар: процент от цены товара, скидка на товар важнее скидки на категорию товара
+        """
+
+        price = 0
+        discounts = self.get_product_discounts(line['product'] for line in lines)
+        for line in lines:
+            sum_discount = discounts[line['product'].id]
+            if sum_discount is not None and 1 <= sum_discount <= 99:
+                line_price = float(line['price'])
+                line_price -= line_price * (sum_discount / 100)
+                line_price *= line['quantity']
+            else:
+                line_price = line['total_price']
+
+            price += round(int(line_price), 2)
+
+        return price
@@ -0,0 +1,146 @@
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import transaction
+from django.utils import timezone
+
+from store.models import Category, Discount, EffectivePrice, Offer, Product
+
+CHUNK_SIZE = 1000
+PRICE_PRECISION = Decimal('0.01')
+
+
+class EffectivePriceService:
+    """
+    Сервис цен предложений со скидкой.
+    Для каждого предложения хранится цена, лучшая действующая скидка на товар (DP) с учетом скидки
+    на категорию товара и итоговая цена, поэтому страницы и корзина не пересчитывают скидки при чтении.
+    Цены пересчитываются только для товаров, которых касается изменение скидки или предложения.
+    """
+
+    def refresh(self, product_ids: Iterable[int]) -> None:
+        """
+        Пересчитывает цены предложений переданных товаров
+        """
+
+        product_ids = set(product_ids)
+        if not product_ids:
+            return
+
+        products = list(Product.objects.filter(id__in=product_ids).only('id', 'category_id'))
+        product_discounts = self._get_best_discounts(
+            Product.discount.through, 'product_id', product_ids,
+        )
+        category_discounts = self._get_best_discounts(
+            Category.discount.through, 'category_id', {product.category_id for product in products},
+        )
+        discounts = {
+            product.id: product_discounts.get(product.id, category_discounts.get(product.category_id))
+            for product in products
+        }
+
+        prices = []
+        for offer in Offer.objects.filter(product_id__in=product_ids).values('id', 'product_id', 'unit_price'):
+            discount_id, sum_discount = discounts.get(offer['product_id']) or (None, None)
+            if sum_discount is None or not 1 <= sum_discount <= 99:
+                discount_id, sum_discount = None, None
+
+            prices.append(EffectivePrice(
+                offer_id=offer['id'],
+                product_id=offer['product_id'],
+                base_price=offer['unit_price'],
+                discount_id=discount_id,
+                sum_discount=sum_discount,
+                final_price=self.get_final_price(offer['unit_price'], sum_discount),
+            ))
+
+        with transaction.atomic():
+            EffectivePrice.objects.filter(product_id__in=product_ids).delete()
+            EffectivePrice.objects.bulk_create(prices)
+
+    def refresh_discount(self, discount: Discount) -> None:
+        """
+        Пересчитывает цены товаров скидки и товаров ее категорий
+        """
+
+        self.refresh(self.get_discount_product_ids(discount.pk))
+
+    def rebuild(self) -> int:
+        """
+        Пересчитывает цены предложений всех товаров
+
+        :return: количество обработанных товаров
+        """
+
+        product_ids = list(Product.objects.values_list('id', flat=True))
+        for start in range(0, len(product_ids), CHUNK_SIZE):
+            self.refresh(product_ids[start:start + CHUNK_SIZE])
+
+        return len(product_ids)
+
+    def apply_schedule(self) -> tuple[int, int]:
+        """
+        Включает скидки, у которых наступила дата начала, и выключает скидки с прошедшей датой окончания.
+        Скидка включается только один раз при наступлении даты начала: после этого у нее ставится отметка
+        schedule_started, поэтому скидка, выключенная администратором вручную, повторно не включается.
+        Отметка хранится в базе и сбрасывается только при изменении даты начала.
+        Скидки сохраняются по одной, поэтому сигналы пересчитывают цены только их товаров.
+
+        :return: количество включенных и выключенных скидок
+        """
+
+        now = timezone.now()
+
+        activated = expired = 0
+        for discount in Discount.objects.filter(schedule_started=False, valid_from__lte=now):
+            if discount.is_active or (discount.valid_to is not None and discount.valid_to <= now):
+                Discount.objects.filter(pk=discount.pk).update(schedule_started=True)
+                continue
+
+            discount.is_active = discount.schedule_started = True
+            discount.save(update_fields=['is_active', 'schedule_started'])
+            activated += 1
+
+        for discount in Discount.objects.filter(is_active=True, valid_to__lte=now):
+            discount.is_active = False
+            discount.save(update_fields=['is_active'])
+            expired += 1
+
+        return activated, expired
+
+    @staticmethod
+    def get_discount_product_ids(discount_id: int) -> set[int]:
+        """
+        Возвращает id товаров скидки и товаров категорий скидки
+        """
+
+        return set(
+            Product.discount.through.objects.filter(discount_id=discount_id).values_list('product_id', flat=True)
+        ) | set(
+            Product.objects.filter(category__discount=discount_id).values_list('id', flat=True)
+        )
+
+    @staticmethod
+    def get_final_price(price: Decimal, sum_discount: float | None) -> Decimal:
+        if sum_discount is None:
+            return price
+
+        return (price - price * Decimal(sum_discount / 100)).quantize(PRICE_PRECISION)
+
+    @staticmethod
+    def _get_best_discounts(through, field: str, object_ids: set) -> dict[int, tuple[int, float]]:
+        """
+        Возвращает лучшую действующую скидку DP: {id объекта: (id скидки, размер скидки)}
+        """
+
+        best = {}
+        for object_id, discount_id, sum_discount in through.objects.filter(
+                **{f'{field}__in': object_ids},
+                discount__name='DP',
+                discount__is_active=True,
+        ).order_by(field, '-discount__sum_discount', 'discount_id').values_list(
+            field, 'discount_id', 'discount__sum_discount',
+        ):
+            best.setdefault(object_id, (discount_id, sum_discount))
+
+        return best
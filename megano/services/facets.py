@@ -0,0 +1,119 @@
+from django.db.models import Count, F, Func, IntegerField, Max, Min, QuerySet, Value
+from django.db.models.functions import Least
+
+from authorization.models import StoreSettings
+from store.models import OfferIndex, Product, ProductStats
+
+PRICE_BUCKETS = 5
+
+
+class FacetService:
+    """
+    Сервис подсчета фасетов для боковой панели каталога.
+    Для текущего набора товаров считает количество товаров по продавцам, тегам, способам доставки,
+    доступности и гистограмму цен. Каждый фасет - один запрос с группировкой, без размножения строк.
+    Ключи словарей - строки, поэтому результат можно хранить в кэше каталога.
+    """
+
+    def __init__(self, product_ids: list[int] | QuerySet):
+        self._product_ids = product_ids
+
+    def get_facets(self) -> dict:
+        """
+        Возвращает все фасеты для переданного набора товаров
+        """
+
+        return {
+            'sellers': self.count_sellers(),
+            'tags': self.count_tags(),
+            'delivery': self.count_delivery(),
+            'availability': self.count_availability(),
+            'price_histogram': self.price_histogram(),
+        }
+
+    def count_sellers(self) -> dict[str, int]:
+        """
+        Количество товаров по продавцам: {id продавца: количество}
+        """
+
+        rows = OfferIndex.objects.filter(
+            product_id__in=self._product_ids,
+        ).values('seller_id').annotate(count=Count('product_id', distinct=True)).order_by()
+
+        return {str(row['seller_id']): row['count'] for row in rows}
+
+    def count_tags(self) -> dict[str, int]:
+        """
+        Количество товаров по тегам: {название тега: количество}
+        """
+
+        rows = Product.tags.through.objects.filter(
+            product_id__in=self._product_ids,
+        ).values('tag__name').annotate(count=Count('product_id', distinct=True)).order_by()
+
+        return {row['tag__name']: row['count'] for row in rows}
+
+    def count_delivery(self) -> dict[str, int]:
+        """
+        Количество товаров по способу доставки продавцов.
+        Ключи совпадают со значениями фильтра delivery_free: 'True' - обычная доставка, 'False' - экспресс.
+        """
+
+        rows = OfferIndex.objects.filter(
+            product_id__in=self._product_ids,
+        ).values('delivery_type').annotate(count=Count('product_id', distinct=True)).order_by()
+
+        choices = {
+            StoreSettings.Delivery.FREE: 'True',
+            StoreSettings.Delivery.EXPRESS: 'False',
+        }
+
+        return {choices[row['delivery_type']]: row['count'] for row in rows if row['delivery_type'] in choices}
+
+    def count_availability(self) -> dict[str, int]:
+        """
+        Количество товаров по доступности: {'True': количество, 'False': количество}
+        """
+
+        rows = Product.objects.filter(
+            id__in=self._product_ids,
+        ).values('availability').annotate(count=Count('id')).order_by()
+
+        return {str(row['availability']): row['count'] for row in rows}
+
+    def price_histogram(self, buckets: int = PRICE_BUCKETS) -> list[dict]:
+        """
+        Гистограмма средних цен товаров: [{'min': цена, 'max': цена, 'count': количество}, ...]
+        """
+
+        stats = ProductStats.objects.filter(product_id__in=self._product_ids, avg_price__isnull=False)
+        bounds = stats.aggregate(min_price=Min('avg_price'), max_price=Max('avg_price'))
+        min_price, max_price = bounds['min_price'], bounds['max_price']
+
+        if min_price is None:
+            return []
+
+        if min_price == max_price:
+            return [{'min': str(min_price), 'max': str(max_price), 'count': stats.count()}]
+
+        step = (max_price - min_price) / buckets
+        rows = stats.annotate(
+            bucket=Least(
+                Func(
+                    F('avg_price'), Value(min_price), Value(max_price), Value(buckets),
+                    function='width_bucket',
+                    output_field=IntegerField(),
+                ),
+                Value(buckets),
+            )
+        ).values('bucket').annotate(count=Count('product_id')).order_by('bucket')
+        counts = {row['bucket']: row['count'] for row in rows}
+
+        return [
+            {
+                'min': str(round(min_price + step * index, 2)),
+                'max': str(round(min_price + step * (index + 1), 2)),
+                'count': counts.get(index + 1, 0),
+            }
+            for index in range(buckets)
+        ]
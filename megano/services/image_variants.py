@@ -0,0 +1,152 @@
+import hashlib
+import io
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.fields.files import FieldFile
+from PIL import Image
+
+from store.models import Product, ProductImage
+from .catalog_cache import CatalogCache
+from .object_cache import ObjectCache
+from .product_detail import ProductDetailCache
+
+VARIANT_WIDTHS = (60, 125, 250, 500)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpeg': ('JPEG', {'quality': 80, 'optimize': True, 'progressive': True}),
+}
+
+
+class ImageVariantService:
+    """
+    Сервис уменьшенных копий изображений товаров.
+    Для изображения создаются копии нескольких ширин в WebP и JPEG (для браузеров без WebP).
+    Путь копии строится из хэша содержимого, поэтому одинаковые изображения разных товаров
+    хранятся один раз, а повторная обработка не создает файлы заново.
+    Результат сохраняется в JSON поле модели и выводится в шаблонах тегом responsive_image.
+    """
+
+    def refresh_product(self, product_id: int) -> None:
+        """
+        Создает копии основного фото товара.
+        Копии сохраняются через update() без сигналов, поэтому кэши товара сбрасываются здесь
+        """
+
+        product = Product.objects.filter(id=product_id).only('id', 'preview', 'preview_variants').first()
+        if product is None or not product.preview:
+            return
+
+        if product.preview_variants.get('source') != product.preview.name:
+            Product.objects.filter(id=product_id).update(preview_variants=self.generate(product.preview))
+            ObjectCache.invalidate_object(Product, product_id)
+            ProductDetailCache.invalidate([product_id])
+            CatalogCache.invalidate()
+
+    def refresh_image(self, image_id: int) -> None:
+        """
+        Создает копии фотографии товара
+        """
+
+        image = ProductImage.objects.filter(id=image_id).first()
+        if image is None or not image.image:
+            return
+
+        if image.image_variants.get('source') != image.image.name:
+            ProductImage.objects.filter(id=image_id).update(image_variants=self.generate(image.image))
+            ProductDetailCache.invalidate([image.product_id])
+
+    def rebuild(self) -> int:
+        """
+        Создает недостающие копии для всех изображений товаров
+
+        :return: количество обработанных изображений
+        """
+
+        product_ids = list(
+            Product.objects.exclude(preview='').exclude(preview__isnull=True).values_list('id', flat=True)
+        )
+        image_ids = list(ProductImage.objects.values_list('id', flat=True))
+
+        for product_id in product_ids:
+            self.refresh_product(product_id)
+        for image_id in image_ids:
+            self.refresh_image(image_id)
+
+        return len(product_ids) + len(image_ids)
+
+    def generate(self, field_file: FieldFile) -> dict:
+        """
+        Создает копии изображения и возвращает их пути:
+        {'source': исходный файл, 'webp': {ширина: путь}, 'jpeg': {ширина: путь}}
+        """
+
+        field_file.open('rb')
+        try:
+            content = field_file.read()
+        finally:
+            field_file.close()
+
+        digest = hashlib.sha1(content).hexdigest()
+        source = Image.open(io.BytesIO(content))
+        source.load()
+        if source.mode not in ('RGB', 'RGBA'):
+            source = source.convert('RGBA' if 'transparency' in source.info else 'RGB')
+
+        widths = [width for width in VARIANT_WIDTHS if width < source.width] + [min(source.width, VARIANT_WIDTHS[-1])]
+        variants = {'source': field_file.name}
+
+        for extension, (image_format, options) in VARIANT_FORMATS.items():
+            variants[extension] = {}
+            for width in sorted(set(widths)):
+                name = f'variants/{digest[:2]}/{digest}/{width}.{extension}'
+                if not default_storage.exists(name):
+                    default_storage.save(name, ContentFile(self._resize(source, width, image_format, options)))
+                variants[extension][str(width)] = name
+
+        return variants
+
+    @staticmethod
+    def get_srcset(field_file: FieldFile, variants: dict, extension: str) -> str:
+        """
+        Возвращает значение атрибута srcset копий в переданном формате
+        """
+
+        if not field_file or variants.get('source') != field_file.name:
+            return ''
+
+        return ', '.join(
+            f'{default_storage.url(name)} {width}w' for width, name in variants.get(extension, {}).items()
+        )
+
+    @staticmethod
+    def get_url(field_file: FieldFile, variants: dict, width: int, extension: str = 'jpeg') -> str:
+        """
+        Возвращает url копии не меньше переданной ширины (или самой большой копии).
+        Если копий еще нет, возвращает url исходного файла.
+        """
+
+        if not field_file:
+            return ''
+
+        if variants.get('source') != field_file.name or not variants.get(extension):
+            return field_file.url
+
+        names = sorted(variants[extension].items(), key=lambda item: int(item[0]))
+        name = next((name for variant_width, name in names if int(variant_width) >= width), names[-1][1])
+
+        return default_storage.url(name)
+
+    @staticmethod
+    def _resize(source: Image.Image, width: int, image_format: str, options: dict) -> bytes:
+        height = max(1, round(source.height * width / source.width))
+        image = source.resize((width, height), Image.LANCZOS)
+        if image_format == 'JPEG' and image.mode == 'RGBA':
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.split()[3])
+            image = background
+
+        buffer = io.BytesIO()
+        image.save(buffer, image_format, **options)
+
+        return buffer.getvalue()
@@ -0,0 +1,132 @@
+import time
+from typing import Callable
+
+from django.core.cache import cache
+from django.db.models import FileField, Model
+
+from .cache_version import CacheVersion
+
+LOCK_TIMEOUT = 10
+LOCK_WAIT_ATTEMPTS = 20
+LOCK_WAIT_INTERVAL = 0.05
+
+
+class ObjectCache:
+    """
+    Кэш объектов модели с чтением через кэш: при попадании в кэш запрос к базе не выполняется.
+    В кэше хранятся значения полей строки, а не pickle объекта, объект восстанавливается через Model.from_db.
+    Вместе со значениями полей хранится версия объекта, которая меняется сигналами при его сохранении и удалении:
+    если версия устарела, объект загружается заново, поэтому сохранение одного объекта не сбрасывает остальные.
+    Ключ содержит версию модели, которая меняется при полной очистке кэша модели.
+    При промахе объект загружает только один процесс (блокировка через cache.add),
+    остальные ждут появления значения в кэше, а не обращаются к базе одновременно.
+    """
+
+    def __init__(self, model: type[Model], timeout: int = None):
+        self._model = model
+        self._timeout = timeout
+        self._concrete_fields = model._meta.concrete_fields
+        self._fields = [field.attname for field in self._concrete_fields]
+
+    @staticmethod
+    def _version_key(model: type[Model], pk=None) -> str:
+        key = f'object-cache-version-{model._meta.label_lower}'
+
+        return key if pk is None else f'{key}-{pk}'
+
+    @classmethod
+    def get_version(cls, model: type[Model], pk=None) -> str:
+        """
+        Возвращает версию модели или, если передан первичный ключ, версию объекта
+        """
+
+        return CacheVersion.get(cls._version_key(model, pk))
+
+    @classmethod
+    def invalidate(cls, model: type[Model]) -> None:
+        """
+        Меняет версию модели, после чего все объекты модели загружаются из базы заново
+        """
+
+        CacheVersion.bump(cls._version_key(model))
+
+    @classmethod
+    def invalidate_object(cls, model: type[Model], pk) -> None:
+        """
+        Меняет версию объекта, после чего он загружается из базы заново по любому ключу
+        """
+
+        CacheVersion.bump(cls._version_key(model, pk))
+
+    def get_by(self, **lookup) -> Model:
+        """
+        Возвращает объект по значениям полей, например get_by(slug=slug)
+
+        :raises Model.DoesNotExist: если объект не найден
+        """
+
+        key = '-'.join(f'{field}={value}' for field, value in sorted(lookup.items()))
+
+        return self.get(key, lambda: self._model.objects.get(**lookup))
+
+    def get(self, key: str, loader: Callable[[], Model]) -> Model:
+        """
+        Возвращает объект из кэша, при промахе загружает его функцией loader
+
+        :param key: ключ объекта внутри модели
+        :param loader: функция без аргументов, возвращающая объект модели
+        """
+
+        cache_key = f'object-{self._model._meta.label_lower}-{self.get_version(self._model)}-{key}'
+        entry = self._get_actual(cache_key)
+
+        if entry is None:
+            lock_key = f'{cache_key}-lock'
+            if cache.add(lock_key, 1, LOCK_TIMEOUT):
+                try:
+                    entry = self._load(cache_key, loader)
+                finally:
+                    cache.delete(lock_key)
+            else:
+                entry = self._wait(cache_key) or self._load(cache_key, loader)
+
+        return self._model.from_db(None, self._fields, entry['row'])
+
+    def _get_actual(self, cache_key: str) -> dict | None:
+        """
+        Возвращает сохраненный объект, если его версия не изменилась
+        """
+
+        entry = cache.get(cache_key)
+        if entry is None or entry['version'] != self.get_version(self._model, entry['pk']):
+            return None
+
+        return entry
+
+    def _load(self, cache_key: str, loader: Callable[[], Model]) -> dict:
+        instance = loader()
+        entry = {
+            'pk': instance.pk,
+            'version': self.get_version(self._model, instance.pk),
+            'row': [
+                getattr(instance, field.attname).name if isinstance(field, FileField)
+                else getattr(instance, field.attname)
+                for field in self._concrete_fields
+            ],
+        }
+        cache.set(cache_key, entry, self._timeout)
+
+        return entry
+
+    def _wait(self, cache_key: str) -> dict | None:
+        """
+        Ожидает, пока объект загрузит процесс, получивший блокировку
+        """
+
+        for _ in range(LOCK_WAIT_ATTEMPTS):
+            time.sleep(LOCK_WAIT_INTERVAL)
+            entry = self._get_actual(cache_key)
+            if entry is not None:
+                return entry
+
+        return None
@@ -0,0 +1,101 @@
+from decimal import Decimal
+from typing import Iterable
+
+from django.db.models import Exists, OuterRef, Q, QuerySet
+
+from store.models import Offer, OfferIndex
+
+CHUNK_SIZE = 1000
+
+
+class OfferIndexService:
+    """
+    Сервис поддержки денормализованного индекса предложений.
+    Строка индекса содержит товар, продавца, цену, количество и способ доставки продавца,
+    поэтому фильтр каталога по цене, продавцам и доставке сводится к одному условию EXISTS.
+    """
+
+    INDEX_FIELDS = ['product', 'seller', 'unit_price', 'amount', 'delivery_type']
+
+    def refresh(self, offer_ids: Iterable[int]) -> None:
+        """
+        Обновляет строки индекса для переданных предложений
+        """
+
+        offer_ids = set(offer_ids)
+        if not offer_ids:
+            return
+
+        offers = Offer.objects.filter(id__in=offer_ids).values(
+            'id', 'product_id', 'seller_id', 'unit_price', 'amount', 'seller__store_settings__delivery_type',
+        )
+
+        OfferIndex.objects.bulk_create(
+            [
+                OfferIndex(
+                    offer_id=offer['id'],
+                    product_id=offer['product_id'],
+                    seller_id=offer['seller_id'],
+                    unit_price=offer['unit_price'],
+                    amount=offer['amount'],
+                    delivery_type=offer['seller__store_settings__delivery_type'],
+                )
+                for offer in offers
+            ],
+            update_conflicts=True,
+            unique_fields=['offer'],
+            update_fields=self.INDEX_FIELDS,
+        )
+
+    def refresh_seller(self, seller_id: int, delivery_type: int | None) -> None:
+        """
+        Обновляет способ доставки во всех строках индекса продавца
+        """
+
+        OfferIndex.objects.filter(seller_id=seller_id).update(delivery_type=delivery_type)
+
+    def rebuild(self) -> int:
+        """
+        Перестраивает индекс для всех предложений
+
+        :return: количество обработанных предложений
+        """
+
+        offer_ids = list(Offer.objects.values_list('id', flat=True))
+        for start in range(0, len(offer_ids), CHUNK_SIZE):
+            self.refresh(offer_ids[start:start + CHUNK_SIZE])
+
+        OfferIndex.objects.exclude(offer_id__in=Offer.objects.values('id')).delete()
+
+        return len(offer_ids)
+
+    @staticmethod
+    def filter_products(
+            queryset: QuerySet,
+            price_range: tuple[Decimal, Decimal] = None,
+            sellers: Iterable = None,
+            delivery_type: int = None,
+    ) -> QuerySet:
+        """
+        Отбирает товары, у которых есть предложение, подходящее одновременно под все переданные условия
+
+        :param queryset: Product objects
+        :param price_range: минимальная и максимальная цена предложения
+        :param sellers: продавцы (Profile или id)
+        :param delivery_type: способ доставки продавца
+        """
+
+        condition = Q()
+        if price_range is not None:
+            condition &= Q(unit_price__range=price_range)
+        if sellers:
+            condition &= Q(seller__in=sellers)
+        if delivery_type is not None:
+            condition &= Q(delivery_type=delivery_type)
+
+        if not condition:
+            return queryset
+
+        return queryset.filter(
+            Exists(OfferIndex.objects.filter(condition, product_id=OuterRef('pk')))
+        )
@@ -0,0 +1,145 @@
+from django.core import signing
+from django.db.models import Q, QuerySet
+
+CURSOR_SALT = 'keyset-pagination'
+
+
+class KeysetPage:
+    """
+    Страница пагинации по ключу. Общее количество объектов не вычисляется.
+    """
+
+    def __init__(self, object_list: list, next_cursor: str | None, previous_cursor: str | None, per_page: int):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.per_page = per_page
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Пагинация по ключу (курсору) вместо OFFSET.
+    Порядок берется из order_by переданного queryset и дополняется первичным ключом,
+    поэтому он остается стабильным при любой сортировке каталога.
+    Поля сортировки должны быть полями модели или аннотациями queryset с точным строковым представлением
+    (числа с плавающей точкой нужно приводить к numeric).
+    Курсор - подписанное значение ключа сортировки последнего (или первого) объекта страницы.
+    """
+
+    def __init__(self, queryset: QuerySet, per_page: int):
+        self._queryset = queryset
+        self._per_page = per_page
+        self._ordering = self._get_ordering(queryset)
+
+    def get_page(self, cursor: str | None = None) -> KeysetPage:
+        """
+        Возвращает страницу после (или до) переданного курсора.
+        Пустой или поврежденный курсор означает первую страницу.
+        """
+
+        direction, values = self._decode_cursor(cursor)
+        backwards = direction == 'previous'
+
+        queryset = self._queryset.order_by(*self._order_by(reverse=backwards))
+        if values is not None:
+            queryset = queryset.filter(self._after(values, reverse=backwards))
+
+        objects = list(queryset[:self._per_page + 1])
+        has_more = len(objects) > self._per_page
+        objects = objects[:self._per_page]
+
+        if backwards:
+            objects.reverse()
+
+        next_cursor = previous_cursor = None
+        if objects:
+            if has_more or backwards:
+                next_cursor = self._encode_cursor('next', objects[-1])
+            if (has_more and backwards) or (values is not None and not backwards):
+                previous_cursor = self._encode_cursor('previous', objects[0])
+
+        return KeysetPage(objects, next_cursor, previous_cursor, self._per_page)
+
+    @staticmethod
+    def _get_ordering(queryset: QuerySet) -> list[tuple[str, bool]]:
+        """
+        Возвращает список (поле, по убыванию) с первичным ключом в конце
+        """
+
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        result = []
+
+        for field in ordering:
+            descending = field.startswith('-')
+            name = field.lstrip('-')
+            if name == 'pk':
+                name = queryset.model._meta.pk.name
+            result.append((name, descending))
+
+        pk_name = queryset.model._meta.pk.name
+        if pk_name not in [name for name, _ in result]:
+            result.append((pk_name, False))
+        else:
+            result = result[:[name for name, _ in result].index(pk_name) + 1]
+
+        return result
+
+    def _order_by(self, reverse: bool = False) -> list[str]:
+        return [
+            f'{"-" if descending != reverse else ""}{name}'
+            for name, descending in self._ordering
+        ]
+
+    def _after(self, values: list, reverse: bool = False) -> Q:
+        """
+        Строит условие (a, b, c) > (x, y, z) с учетом направлений сортировки
+        """
+
+        condition = Q()
+        for index, (name, descending) in enumerate(self._ordering):
+            lookup = 'lt' if descending != reverse else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[index]})
+            for previous_index, (previous_name, _) in enumerate(self._ordering[:index]):
+                step &= Q(**{previous_name: values[previous_index]})
+            condition |= step
+
+        return condition
+
+    def _encode_cursor(self, direction: str, obj) -> str:
+        values = [getattr(obj, name) for name, _ in self._ordering]
+
+        return signing.dumps(
+            {'d': direction, 'v': [str(value) for value in values]},
+            salt=CURSOR_SALT,
+            compress=True,
+        )
+
+    def _decode_cursor(self, cursor: str | None) -> tuple[str, list | None]:
+        if not cursor:
+            return 'next', None
+
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+            values = data['v']
+            if len(values) != len(self._ordering):
+                return 'next', None
+
+            return data['d'], values
+
+        except (signing.BadSignature, KeyError, TypeError):
+            return 'next', None
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from store.models import Orders, Product, Tag
+
+POPULAR_TAGS_COUNT = 10
+
+
+class PopularTagsService:
+    """
+    Сервис рейтинга популярных тегов.
+    У тега хранится количество оплаченных заказов его товаров, счетчик увеличивается при оплате заказа
+    и периодически пересчитывается полностью. Каталог получает из кэша только названия первых тегов рейтинга.
+    """
+
+    CACHE_KEY = 'popular-tags'
+
+    def get_top(self) -> list[str]:
+        """
+        Возвращает названия самых популярных тегов
+        """
+
+        return cache.get_or_set(
+            self.CACHE_KEY,
+            lambda: list(
+                Tag.objects.order_by('-paid_orders', 'id').values_list('name', flat=True)[:POPULAR_TAGS_COUNT]
+            ),
+            None,
+        )
+
+    def register_paid_order(self, order: Orders) -> None:
+        """
+        Увеличивает счетчики тегов товаров оплаченного заказа
+        """
+
+        rows = Product.tags.through.objects.filter(
+            product__in=order.products.all(),
+        ).values('tag_id').annotate(count=Count('product_id')).order_by()
+
+        tags_by_count = {}
+        for row in rows:
+            tags_by_count.setdefault(row['count'], []).append(row['tag_id'])
+
+        for count, tag_ids in tags_by_count.items():
+            Tag.objects.filter(id__in=tag_ids).update(paid_orders=F('paid_orders') + count)
+
+        if tags_by_count:
+            self.clear_cache()
+
+    def recompute(self) -> None:
+        """
+        Полностью пересчитывает счетчики оплаченных заказов всех тегов
+        """
+
+        paid_orders = Product.tags.through.objects.filter(
+            tag_id=OuterRef('pk'),
+            product__orders__status=Orders.Status.PAID,
+        ).values('tag_id').annotate(count=Count('*')).values('count')
+
+        Tag.objects.update(
+            paid_orders=Coalesce(Subquery(paid_orders, output_field=IntegerField()), Value(0)),
+        )
+        self.clear_cache()
+
+    def clear_cache(self) -> None:
+        cache.delete(self.CACHE_KEY)
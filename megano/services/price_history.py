@@ -0,0 +1,181 @@
+import math
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Avg, Max, Min, Sum
+from django.utils import timezone
+
+from store.models import Offer, OfferPriceHistory, Product, ProductPriceDaily
+
+PRICE_PRECISION = Decimal('0.01')
+MAX_DAYS = 365
+MAX_POINTS = 200
+
+
+class PriceHistoryService:
+    """
+    Сервис истории цен и остатков.
+    Каждое изменение предложения дописывается в строку предложения за месяц в виде разностей
+    с предыдущим значением, поэтому история занимает одну строку на предложение в месяц.
+    Одновременно обновляется дневной агрегат товара, по которому строится график:
+    прореженный ряд читает не больше одной строки на день и не разбирает изменения предложений.
+    """
+
+    def record(self, offer: Offer) -> None:
+        """
+        Дописывает изменение цены или остатка предложения и обновляет дневной агрегат товара
+        """
+
+        now = timezone.now()
+        price = Decimal(str(offer.unit_price)).quantize(PRICE_PRECISION)
+        amount = int(offer.amount)
+
+        with transaction.atomic():
+            history, created = OfferPriceHistory.objects.select_for_update().get_or_create(
+                offer_id=offer.pk,
+                month=timezone.localdate(now).replace(day=1),
+                defaults={
+                    'product_id': offer.product_id,
+                    'started_at': now,
+                    'start_price': price,
+                    'start_amount': amount,
+                    'last_price': price,
+                    'last_amount': amount,
+                },
+            )
+            if not created:
+                if history.last_price == price and history.last_amount == amount:
+                    return
+
+                history.points.append([
+                    int((now - history.started_at).total_seconds()),
+                    int((price - history.last_price) * 100),
+                    amount - history.last_amount,
+                ])
+                history.last_price, history.last_amount = price, amount
+                history.save(update_fields=['points', 'last_price', 'last_amount'])
+
+        self.record_product_day(offer.product_id)
+
+    def record_product_day(self, product_id: int) -> None:
+        """
+        Обновляет дневной агрегат товара по текущим предложениям
+        """
+
+        if not Product.objects.filter(id=product_id).exists():
+            return
+
+        prices = Offer.objects.filter(product_id=product_id).aggregate(
+            min_price=Min('unit_price'),
+            max_price=Max('unit_price'),
+            avg_price=Avg('unit_price'),
+            amount=Sum('amount'),
+        )
+        avg_price = prices['avg_price'].quantize(PRICE_PRECISION) if prices['avg_price'] is not None else None
+
+        with transaction.atomic():
+            daily, created = ProductPriceDaily.objects.select_for_update().get_or_create(
+                product_id=product_id,
+                day=timezone.localdate(),
+                defaults={
+                    'min_price': prices['min_price'],
+                    'max_price': prices['max_price'],
+                    'avg_price': avg_price,
+                    'last_min_price': prices['min_price'],
+                    'last_max_price': prices['max_price'],
+                    'amount': prices['amount'] or 0,
+                },
+            )
+            if not created:
+                daily.min_price = self._extreme(min, daily.min_price, prices['min_price'])
+                daily.max_price = self._extreme(max, daily.max_price, prices['max_price'])
+                daily.avg_price = avg_price
+                daily.last_min_price, daily.last_max_price = prices['min_price'], prices['max_price']
+                daily.amount = prices['amount'] or 0
+                daily.save(update_fields=['min_price', 'max_price', 'avg_price', 'last_min_price', 'last_max_price',
+                                          'amount'])
+
+    @staticmethod
+    def decode(history: OfferPriceHistory) -> list[tuple[datetime, Decimal, int]]:
+        """
+        Восстанавливает изменения предложения за месяц: [(время, цена, остаток)]
+        """
+
+        price, amount = history.start_price, history.start_amount
+        changes = [(history.started_at, price, amount)]
+        for seconds, price_delta, amount_delta in history.points:
+            price += Decimal(price_delta) / 100
+            amount += amount_delta
+            changes.append((history.started_at + timedelta(seconds=seconds), price, amount))
+
+        return changes
+
+    def get_offer_history(self, offer_id: int, limit: int = 20) -> list[tuple[datetime, Decimal, int]]:
+        """
+        Возвращает последние изменения цены и остатка предложения
+        """
+
+        changes = []
+        for history in OfferPriceHistory.objects.filter(offer_id=offer_id).order_by('-month'):
+            changes = self.decode(history) + changes
+            if len(changes) >= limit:
+                break
+
+        return changes[-limit:]
+
+    def get_series(self, product_id: int, days: int = 90, points: int = 60) -> list[dict]:
+        """
+        Возвращает ряд цены товара за последние days дней, прореженный до points значений.
+        Для каждого интервала возвращаются минимальная и максимальная цена, а также
+        средняя цена и остаток на конец интервала. Дни без изменений продолжают минимальную и максимальную
+        цену на конец предыдущего дня изменений.
+        """
+
+        days = min(max(days, 1), MAX_DAYS)
+        points = min(max(points, 1), MAX_POINTS)
+        today = timezone.localdate()
+        start = today - timedelta(days=days - 1)
+
+        rows = {row.day: row for row in ProductPriceDaily.objects.filter(product_id=product_id, day__gte=start)}
+        state = ProductPriceDaily.objects.filter(product_id=product_id, day__lt=start).order_by('-day').first()
+        bucket_days = math.ceil(days / points)
+
+        series = []
+        for bucket_start in range(0, days, bucket_days):
+            bucket = {'date': start + timedelta(days=bucket_start), 'min_price': None, 'max_price': None}
+            for offset in range(bucket_start, min(bucket_start + bucket_days, days)):
+                row = rows.get(start + timedelta(days=offset))
+                if row is not None:
+                    state = row
+                    bucket['min_price'] = self._extreme(min, bucket['min_price'], row.min_price)
+                    bucket['max_price'] = self._extreme(max, bucket['max_price'], row.max_price)
+                elif state is not None:
+                    bucket['min_price'] = self._extreme(min, bucket['min_price'], state.last_min_price)
+                    bucket['max_price'] = self._extreme(max, bucket['max_price'], state.last_max_price)
+
+            if state is None:
+                continue
+
+            series.append({
+                'date': bucket['date'].isoformat(),
+                'min_price': self._price(bucket['min_price']),
+                'max_price': self._price(bucket['max_price']),
+                'avg_price': self._price(state.avg_price),
+                'amount': state.amount,
+            })
+
+        return series
+
+    @staticmethod
+    def _extreme(function, current, value):
+        if current is None:
+            return value
+        if value is None:
+            return current
+
+        return function(current, value)
+
+    @staticmethod
+    def _price(price: Decimal | None) -> str | None:
+        return str(price.quantize(PRICE_PRECISION)) if price is not None else None
@@ -0,0 +1,94 @@
+from typing import Iterable
+
+from django.core.cache import cache
+from django.utils.translation import get_language
+
+from store.configs import settings
+from store.models import Offer, Product, ProductImage
+from .cache_version import CacheVersion
+from .object_cache import ObjectCache
+from .related_products import RelatedProductsService
+from .services import ProductService, ReviewsProduct
+
+
+class ProductDetailCache:
+    """
+    Кэш данных детальной страницы товара: товар, изображения, предложения, характеристики, теги, цены, отзывы
+    и рекомендации.
+    Ключ содержит версию товара, которая меняется сигналами при изменении товара, его предложений, отзывов,
+    изображений и характеристик, и общую версию, которая меняется при изменении скидок, тегов, категорий
+    и очистке кэша в админке.
+    Поэтому повторный просмотр страницы не обращается к базе.
+    """
+
+    VERSION_KEY = 'product-detail-version'
+
+    @staticmethod
+    def _version_key(product_id: int) -> str:
+        return f'product-detail-version-{product_id}'
+
+    @classmethod
+    def invalidate(cls, product_ids: Iterable[int]) -> None:
+        """
+        Меняет версию переданных товаров
+        """
+
+        for product_id in set(product_ids):
+            CacheVersion.bump(cls._version_key(product_id))
+
+    @classmethod
+    def invalidate_all(cls) -> None:
+        """
+        Меняет общую версию, после чего данные всех страниц товаров собираются заново
+        """
+
+        CacheVersion.bump(cls.VERSION_KEY)
+
+    def get(self, slug: str) -> dict:
+        """
+        Возвращает данные страницы товара по слагу
+
+        :raises Product.DoesNotExist: если товар не найден
+        """
+
+        product_id = ObjectCache(Product).get_by(slug=slug).id
+
+        version_keys = [self._version_key(product_id), self.VERSION_KEY]
+        versions = cache.get_many(version_keys)
+        product_version, version = (versions.get(key) or CacheVersion.get(key) for key in version_keys)
+        key = f'product-detail-{product_id}-{product_version}-{version}-{get_language()}'
+
+        payload = cache.get(key)
+        if payload is None:
+            payload = self._build(product_id)
+            cache.set(key, payload, settings.get_cache_product_detail())
+
+        return payload
+
+    @staticmethod
+    def _build(product_id: int) -> dict:
+        """
+        Собирает данные страницы товара
+        """
+
+        product = Product.objects.select_related('category').get(id=product_id)
+
+        offers = list(Offer.objects.filter(product=product).select_related('seller__store_settings', 'effective_price'))
+        for offer in offers:
+            offer.discount_price = offer.get_discount_price()
+
+        reviews = ReviewsProduct.get_reviews_page(product)
+
+        return {
+            'product': product,
+            'images': list(ProductImage.objects.filter(product=product)),
+            'offers': offers,
+            'feature': ProductService(product).get_context()['feature'],
+            'tags': list(product.tags.all()),
+            'average_price': product.get_average_price(),
+            'discount_price': product.get_discount_price(),
+            'num_reviews': ReviewsProduct.get_number_of_reviews_for_product(product),
+            'reviews': reviews.object_list,
+            'reviews_next_cursor': reviews.next_cursor,
+            'related_products': RelatedProductsService().get_related(product.id),
+        }
@@ -0,0 +1,47 @@
+from typing import Iterable
+
+from django.db.models import Avg, Min, Q
+
+from store.models import EffectivePrice, Product
+
+
+class ProductPriceService:
+    """
+    Сервис цен карточек товаров.
+    Средняя, минимальная цена и средняя цена со скидкой страницы товаров считаются одним запросом
+    с группировкой по товару из таблицы EffectivePrice. Результат сохраняется в атрибут prices товара,
+    который проверяют Product.get_average_price и Product.get_discount_price,
+    поэтому шаблоны карточек не выполняют запросов для каждого товара.
+    """
+
+    def attach(self, products: Iterable[Product | None]) -> None:
+        """
+        Добавляет товарам атрибут prices: {'average_price', 'min_price', 'discount_price'}
+        """
+
+        products = [product for product in products if product is not None]
+        if not products:
+            return
+
+        aggregates = {
+            row['product_id']: row
+            for row in EffectivePrice.objects.filter(product_id__in={product.id for product in products}).values(
+                'product_id',
+            ).annotate(
+                avg_price=Avg('base_price'),
+                min_price=Min('base_price'),
+                discount_price=Avg('final_price', filter=Q(discount__isnull=False)),
+            ).order_by()
+        }
+
+        for product in products:
+            row = aggregates.get(product.id, {})
+            product.prices = {
+                'average_price': self._round(row.get('avg_price')),
+                'min_price': row.get('min_price'),
+                'discount_price': self._round(row.get('discount_price')),
+            }
+
+    @staticmethod
+    def _round(price):
+        return round(price) if price is not None else None
@@ -0,0 +1,149 @@
+from typing import Iterable
+
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField
+from django.db.models import DecimalField, F, Func, Value
+from django.db.models.functions import Cast
+
+from compare.models import AbstractCharacteristicModel
+from store.models import Product
+
+CHUNK_SIZE = 500
+
+SKIPPED_FEATURE_FIELDS = ('id', 'content_type', 'object_id', 'abstractcharacteristicmodel_ptr')
+
+
+class ProductSearchService:
+    """
+    Сервис полнотекстового поиска товаров (PostgreSQL tsvector).
+    Вектор поиска содержит названия товара (вес A), описание (вес B) и значения характеристик (вес C)
+    с русской и английской конфигурацией и хранится в поле Product.search_vector с GIN индексом.
+    """
+
+    CONFIGS = {
+        'ru': 'russian',
+        'en': 'english',
+    }
+
+    def update(self, product_ids: Iterable[int]) -> None:
+        """
+        Пересчитывает вектор поиска для переданных товаров
+        """
+
+        product_ids = set(product_ids)
+        if not product_ids:
+            return
+
+        products = Product.objects.filter(id__in=product_ids).only('id', 'description_ru', 'description_en')
+        features = self._get_features_text(product_ids)
+
+        for product in products:
+            description = ' '.join(
+                self._flatten(product.description_ru) + self._flatten(product.description_en)
+            )
+            Product.objects.filter(id=product.id).update(
+                search_vector=self._build_vector(description, features.get(product.id, ''))
+            )
+
+    def rebuild(self) -> int:
+        """
+        Пересчитывает вектор поиска для всех товаров
+
+        :return: количество обработанных товаров
+        """
+
+        product_ids = list(Product.objects.values_list('id', flat=True))
+        for start in range(0, len(product_ids), CHUNK_SIZE):
+            self.update(product_ids[start:start + CHUNK_SIZE])
+
+        return len(product_ids)
+
+    def search(self, queryset: Product.objects, value: str) -> Product.objects:
+        """
+        Фильтрует товары по поисковому запросу, порядок queryset не меняется
+        """
+
+        return queryset.filter(search_vector=self._build_query(value))
+
+    def rank(self, queryset: Product.objects, value: str) -> Product.objects:
+        """
+        Добавляет товарам релевантность поискового запроса (аннотация rank).
+        Релевантность приводится к numeric: значение float4 не переживает передачу через курсор
+        пагинации по ключу без потерь, а numeric сравнивается с параметром курсора точно.
+        """
+
+        return queryset.annotate(
+            rank=Cast(
+                SearchRank(F('search_vector'), self._build_query(value)),
+                output_field=DecimalField(max_digits=12, decimal_places=8),
+            )
+        )
+
+    def search_by_feature(self, queryset: Product.objects, value: str) -> Product.objects:
+        """
+        Фильтрует товары по поисковому запросу только среди характеристик (лексемы с весом C)
+        """
+
+        return queryset.annotate(
+            feature_vector=Func(
+                F('search_vector'),
+                function='ts_filter',
+                template="%(function)s(%(expressions)s, '{c}')",
+                output_field=SearchVectorField(),
+            )
+        ).filter(feature_vector=self._build_query(value))
+
+    def _build_query(self, value: str) -> SearchQuery:
+        query = None
+        for config in self.CONFIGS.values():
+            config_query = SearchQuery(value, config=config, search_type='websearch')
+            query = config_query if query is None else query | config_query
+
+        return query
+
+    def _build_vector(self, description: str, features: str) -> SearchVector:
+        vector = None
+        for language, config in self.CONFIGS.items():
+            config_vector = (
+                SearchVector(f'name_{language}', config=config, weight='A')
+                + SearchVector(Value(description), config=config, weight='B')
+                + SearchVector(Value(features), config=config, weight='C')
+            )
+            vector = config_vector if vector is None else vector + config_vector
+
+        return vector
+
+    @staticmethod
+    def _get_features_text(product_ids: set) -> dict[int, str]:
+        """
+        Собирает значения характеристик товаров в строку для каждого товара
+        """
+
+        content_type = ContentType.objects.get_for_model(Product)
+        features = {}
+
+        for model in AbstractCharacteristicModel.__subclasses__():
+            rows = model.objects.filter(content_type=content_type, object_id__in=product_ids)
+            for row in rows:
+                values = [
+                    str(getattr(row, field.attname))
+                    for field in model._meta.concrete_fields
+                    if field.name not in SKIPPED_FEATURE_FIELDS and getattr(row, field.attname) not in (None, '')
+                ]
+                features[row.object_id] = ' '.join([features.get(row.object_id, '')] + values).strip()
+
+        return features
+
+    def _flatten(self, value) -> list[str]:
+        """
+        Возвращает все строки из JSON описания товара
+        """
+
+        if isinstance(value, str):
+            return [value]
+        if isinstance(value, dict):
+            value = list(value.values())
+        if isinstance(value, list):
+            return [text for item in value for text in self._flatten(item)]
+
+        return []
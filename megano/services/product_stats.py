@@ -0,0 +1,103 @@
+from typing import Iterable
+
+from django.db.models import Avg, Count, Max, Min, Sum
+
+from store.models import Offer, Orders, Product, ProductStats, Reviews
+
+CHUNK_SIZE = 1000
+
+
+class ProductStatsService:
+    """
+    Сервис поддержки предрассчитанных агрегатов товаров (цены, заказы, отзывы, остатки).
+    Агрегаты пересчитываются только для затронутых товаров при изменении предложений, заказов и отзывов.
+    """
+
+    STATS_FIELDS = ['min_price', 'avg_price', 'max_price', 'paid_orders', 'reviews_count', 'total_amount',
+                    'updated_at']
+
+    def refresh(self, product_ids: Iterable[int]) -> None:
+        """
+        Пересчитывает агрегаты для переданных товаров, удаленные товары пропускаются
+
+        :param product_ids: id товаров, данные которых изменились
+        """
+
+        product_ids = set(Product.objects.filter(id__in=set(product_ids)).values_list('id', flat=True))
+        if not product_ids:
+            return
+
+        stats = {product_id: ProductStats(product_id=product_id) for product_id in product_ids}
+
+        self._collect_prices(stats)
+        self._collect_orders(stats)
+        self._collect_reviews(stats)
+
+        ProductStats.objects.bulk_create(
+            stats.values(),
+            update_conflicts=True,
+            unique_fields=['product'],
+            update_fields=self.STATS_FIELDS,
+        )
+
+    def rebuild(self) -> int:
+        """
+        Полностью перестраивает таблицу агрегатов для всех товаров
+
+        :return: количество обработанных товаров
+        """
+
+        product_ids = list(Product.objects.values_list('id', flat=True))
+        for start in range(0, len(product_ids), CHUNK_SIZE):
+            self.refresh(product_ids[start:start + CHUNK_SIZE])
+
+        return len(product_ids)
+
+    @staticmethod
+    def _collect_prices(stats: dict) -> None:
+        """
+        Минимальная, средняя, максимальная цена и общий остаток по предложениям продавцов
+        """
+
+        prices = Offer.objects.filter(
+            product_id__in=stats.keys(),
+        ).values('product_id').annotate(
+            min_price=Min('unit_price'),
+            avg_price=Avg('unit_price'),
+            max_price=Max('unit_price'),
+            total_amount=Sum('amount'),
+        ).order_by()
+
+        for row in prices:
+            product_stats = stats[row['product_id']]
+            product_stats.min_price = row['min_price']
+            product_stats.avg_price = round(row['avg_price'], 2)
+            product_stats.max_price = row['max_price']
+            product_stats.total_amount = row['total_amount'] or 0
+
+    @staticmethod
+    def _collect_orders(stats: dict) -> None:
+        """
+        Количество оплаченных заказов с товаром
+        """
+
+        orders = Orders.products.through.objects.filter(
+            product_id__in=stats.keys(),
+            orders__status=Orders.Status.PAID,
+        ).values('product_id').annotate(count=Count('orders_id')).order_by()
+
+        for row in orders:
+            stats[row['product_id']].paid_orders = row['count']
+
+    @staticmethod
+    def _collect_reviews(stats: dict) -> None:
+        """
+        Количество отзывов о товаре
+        """
+
+        reviews = Reviews.objects.filter(
+            product_id__in=stats.keys(),
+        ).values('product_id').annotate(count=Count('id')).order_by()
+
+        for row in reviews:
+            stats[row['product_id']].reviews_count = row['count']
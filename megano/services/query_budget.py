@@ -0,0 +1,128 @@
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+
+SUMMARY_CACHE_KEY = 'query-budget-summary'
+SUMMARY_SAMPLES = 50
+DUPLICATES_IN_SUMMARY = 3
+
+current_budget = ContextVar('current_budget', default=None)
+
+
+class QueryBudget:
+    """
+    Счетчики одного запроса: количество SQL запросов, общее время в базе, повторяющиеся запросы
+    и обращения к кэшу. Подключается к соединению через connection.execute_wrapper.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_get = 0
+        self.cache_set = 0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            self.fingerprints[sql] += 1
+
+    def get_duplicates(self) -> list[tuple[str, int]]:
+        """
+        Возвращает SQL, выполненные больше одного раза (признак N+1), начиная с самых частых
+        """
+
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count > 1]
+
+    def get_header(self) -> str:
+        """
+        Возвращает значение заголовка X-Query-Budget
+        """
+
+        duplicates = sum(count - 1 for _, count in self.get_duplicates())
+
+        return (f'queries={self.queries}; db_time={self.db_time * 1000:.1f}ms; duplicates={duplicates}; '
+                f'cache_get={self.cache_get}; cache_set={self.cache_set}')
+
+
+class InstrumentedFileBasedCache(FileBasedCache):
+    """
+    Файловый кэш, который считает чтения и записи для QueryBudget текущего запроса
+    """
+
+    def get(self, key, default=None, version=None):
+        budget = current_budget.get()
+        if budget is not None:
+            budget.cache_get += 1
+
+        return super().get(key, default, version)
+
+    def set(self, key, value, timeout=None, version=None):
+        budget = current_budget.get()
+        if budget is not None:
+            budget.cache_set += 1
+
+        return super().set(key, value, timeout, version)
+
+    def add(self, key, value, timeout=None, version=None):
+        budget = current_budget.get()
+        if budget is not None:
+            budget.cache_set += 1
+
+        return super().add(key, value, timeout, version)
+
+
+class QueryBudgetService:
+    """
+    Сервис сводки по запросам к базе в разрезе вьюшек.
+    Для каждой вьюшки хранится SUMMARY_SAMPLES последних замеров, из них считаются средние и максимум.
+    """
+
+    def add_sample(self, view_name: str, budget: QueryBudget) -> None:
+        """
+        Добавляет замер запроса в сводку вьюшки
+        """
+
+        summary = cache.get(SUMMARY_CACHE_KEY, {})
+        samples = summary.get(view_name, [])
+        samples.append((
+            budget.queries,
+            budget.db_time,
+            budget.cache_get,
+            budget.cache_set,
+            [(sql[:200], count) for sql, count in budget.get_duplicates()[:DUPLICATES_IN_SUMMARY]],
+        ))
+        summary[view_name] = samples[-SUMMARY_SAMPLES:]
+        cache.set(SUMMARY_CACHE_KEY, summary, None)
+
+    def get_summary(self) -> list[dict]:
+        """
+        Возвращает сводку по вьюшкам, отсортированную по среднему количеству запросов
+        """
+
+        result = []
+        for view_name, samples in cache.get(SUMMARY_CACHE_KEY, {}).items():
+            count = len(samples)
+            result.append({
+                'view': view_name,
+                'requests': count,
+                'avg_queries': round(sum(sample[0] for sample in samples) / count, 1),
+                'max_queries': max(sample[0] for sample in samples),
+                'avg_db_time': round(sum(sample[1] for sample in samples) / count * 1000, 1),
+                'avg_cache_get': round(sum(sample[2] for sample in samples) / count, 1),
+                'avg_cache_set': round(sum(sample[3] for sample in samples) / count, 1),
+                'duplicates': samples[-1][4],
+            })
+
+        return sorted(result, key=lambda row: row['avg_queries'], reverse=True)
+
+    @staticmethod
+    def clear() -> None:
+        cache.delete(SUMMARY_CACHE_KEY)
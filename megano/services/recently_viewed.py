@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db.models import Subquery
+from django.http import HttpRequest
+from django.utils import timezone
+
+from store.models import Product, ViewedProduct
+from .best_offer import BestOfferService
+from .product_prices import ProductPriceService
+
+SESSION_KEY = 'products_viewed'
+
+
+class RecentlyViewedService:
+    """
+    Сервис просмотренных товаров.
+    Просмотры авторизованного пользователя хранятся в таблице ViewedProduct, анонимного - в сессии.
+    Просмотр пользователя сохраняется одной вставкой с обновлением времени просмотра при повторе,
+    после чего удаляются просмотры сверх лимита. При входе просмотры сессии переносятся в таблицу.
+    """
+
+    LIMIT_PRODUCTS = 20
+
+    def __init__(self, request: HttpRequest):
+        self._request = request
+
+    def add_product_to_viewed(self, product_id: int) -> None:
+        """
+        Переносит товар в начало списка просмотренных, при переполнении удаляет самые старые просмотры
+        """
+
+        if self._request.user.is_authenticated:
+            self._save_user_views(self._request.user.id, [product_id])
+            return
+
+        viewed = [viewed_id for viewed_id in self._request.session.get(SESSION_KEY, []) if viewed_id != product_id]
+        viewed.append(product_id)
+        self._request.session[SESSION_KEY] = viewed[-self.LIMIT_PRODUCTS:]
+
+    def get_viewed_ids(self) -> list[int]:
+        """
+        Возвращает id просмотренных товаров, начиная с последнего просмотра
+        """
+
+        if self._request.user.is_authenticated:
+            return list(
+                ViewedProduct.objects.filter(user_id=self._request.user.id).order_by(
+                    '-viewed_at', '-id',
+                ).values_list('product_id', flat=True)[:self.LIMIT_PRODUCTS]
+            )
+
+        return list(reversed(self._request.session.get(SESSION_KEY, [])))
+
+    def get_viewed_product_list(self) -> list[Product]:
+        """
+        Возвращает просмотренные товары вместе с ценами, тегами и лучшими предложениями.
+        Количество запросов не зависит от количества товаров.
+        """
+
+        viewed_ids = self.get_viewed_ids()
+        if not viewed_ids:
+            return []
+
+        products = Product.objects.filter(id__in=viewed_ids).prefetch_related('tags')
+        products_dict = {product.id: product for product in products}
+        viewed_list = [products_dict[product_id] for product_id in viewed_ids if product_id in products_dict]
+        BestOfferService().attach(viewed_list)
+        ProductPriceService().attach(viewed_list)
+
+        return viewed_list
+
+    @classmethod
+    def merge_session_to_user(cls, request: HttpRequest, user: User) -> None:
+        """
+        Переносит просмотры анонимной сессии в список пользователя, просмотры сессии считаются более новыми
+        """
+
+        if request is None:
+            return
+
+        viewed = request.session.pop(SESSION_KEY, None)
+        if not viewed:
+            return
+
+        existing = set(Product.objects.filter(id__in=viewed).values_list('id', flat=True))
+        cls._save_user_views(user.id, [product_id for product_id in viewed if product_id in existing])
+
+    @classmethod
+    def _save_user_views(cls, user_id: int, product_ids: list[int]) -> None:
+        """
+        Сохраняет просмотры пользователя (от старого к новому) и удаляет просмотры сверх лимита
+        """
+
+        if not product_ids:
+            return
+
+        now = timezone.now()
+        ViewedProduct.objects.bulk_create(
+            [
+                ViewedProduct(user_id=user_id, product_id=product_id, viewed_at=now + timedelta(microseconds=index))
+                for index, product_id in enumerate(product_ids)
+            ],
+            update_conflicts=True,
+            unique_fields=['user', 'product'],
+            update_fields=['viewed_at'],
+        )
+
+        latest = ViewedProduct.objects.filter(user_id=user_id).order_by('-viewed_at', '-id').values('id')
+        ViewedProduct.objects.filter(user_id=user_id).exclude(
+            id__in=Subquery(latest[:cls.LIMIT_PRODUCTS]),
+        ).delete()
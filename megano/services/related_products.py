@@ -0,0 +1,125 @@
+from typing import Iterable
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from store.models import Orders, Product, RelatedProduct
+
+RELATED_PRODUCTS_COUNT = 8
+CHUNK_SIZE = 1000
+
+
+class RelatedProductsService:
+    """
+    Сервис рекомендаций "С этим товаром покупают".
+    Матрица совместных покупок считается в базе одним запросом с группировкой по парам товаров
+    из оплаченных заказов, для каждого товара сохраняются RELATED_PRODUCTS_COUNT лучших пар.
+    Строки товара зависят только от заказов с этим товаром, поэтому при оплате заказа
+    пересчитываются только товары этого заказа, а полный пересчет выполняется периодически.
+    """
+
+    @staticmethod
+    def _key(product_id: int) -> str:
+        return f'related-products-{product_id}'
+
+    def get_related_ids(self, product_id: int) -> list[int]:
+        """
+        Возвращает id рекомендуемых товаров, начиная с самых частых совместных покупок
+        """
+
+        return cache.get_or_set(
+            self._key(product_id),
+            lambda: list(
+                RelatedProduct.objects.filter(product_id=product_id).order_by('-score', 'related_id').values_list(
+                    'related_id', flat=True,
+                )
+            ),
+            None,
+        )
+
+    def get_related(self, product_id: int) -> list[Product]:
+        """
+        Возвращает рекомендуемые товары вместе с агрегатами цен
+        """
+
+        related_ids = self.get_related_ids(product_id)
+        if not related_ids:
+            return []
+
+        products = Product.objects.filter(id__in=related_ids).select_related('stats')
+        products = {product.id: product for product in products}
+
+        return [products[related_id] for related_id in related_ids if related_id in products]
+
+    def refresh(self, product_ids: Iterable[int]) -> None:
+        """
+        Пересчитывает рекомендации переданных товаров
+        """
+
+        product_ids = set(product_ids)
+        if not product_ids:
+            return
+
+        rows = self._get_top_pairs(product_ids)
+
+        with transaction.atomic():
+            RelatedProduct.objects.filter(product_id__in=product_ids).delete()
+            RelatedProduct.objects.bulk_create(
+                RelatedProduct(product_id=row['product_id'], related_id=row['related_id'], score=row['score'])
+                for row in rows
+            )
+
+        from .product_detail import ProductDetailCache
+
+        cache.delete_many([self._key(product_id) for product_id in product_ids])
+        ProductDetailCache.invalidate(product_ids)
+
+    def register_paid_order(self, order: Orders) -> None:
+        """
+        Пересчитывает рекомендации товаров оплаченного заказа
+        """
+
+        self.refresh(order.products.values_list('id', flat=True))
+
+    def rebuild(self) -> int:
+        """
+        Полностью пересчитывает рекомендации всех товаров
+
+        :return: количество обработанных товаров
+        """
+
+        product_ids = list(Product.objects.values_list('id', flat=True))
+        for start in range(0, len(product_ids), CHUNK_SIZE):
+            self.refresh(product_ids[start:start + CHUNK_SIZE])
+
+        return len(product_ids)
+
+    @staticmethod
+    def _get_top_pairs(product_ids: set) -> list[dict]:
+        """
+        Возвращает лучшие пары товаров: {'product_id', 'related_id', 'score'},
+        где score - количество оплаченных заказов, в которых товары куплены вместе
+        """
+
+        return list(
+            Orders.products.through.objects.filter(
+                product_id__in=product_ids,
+                orders__status=Orders.Status.PAID,
+            ).annotate(
+                related_id=F('orders__products'),
+            ).exclude(
+                related_id=F('product_id'),
+            ).values('product_id', 'related_id').annotate(
+                score=Count('orders_id', distinct=True),
+            ).annotate(
+                rank=Window(
+                    RowNumber(),
+                    partition_by=F('product_id'),
+                    order_by=[F('score').desc(), F('related_id').asc()],
+                ),
+            ).filter(
+                rank__lte=RELATED_PRODUCTS_COUNT,
+            ).values('product_id', 'related_id', 'score')
+        )
@@ -8,7 +8,7 @@ from django.core.files import File
 from urllib.request import urlopen
 from urllib.error import HTTPError
 
-from compare.models import *
+from compare.registry import registry
 
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -17,21 +17,29 @@ from typing import Dict
 
 from django.core.cache import cache
 from django.contrib.auth.models import User
+from django.utils.formats import date_format
+from django.utils.timezone import localtime
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import authenticate, login
 from urllib.parse import urlparse, parse_qs, urlencode
 
-from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Avg, Count, When, Case
+from django.db.models import Count
+from django.db.models.functions import Coalesce
 
 from django.db import IntegrityError
 from django.http import HttpRequest
-from django.shortcuts import get_object_or_404
 
 from authorization.forms import RegisterForm, LoginForm
 from authorization.models import Profile
-from store.models import Product, Offer, Category, Reviews, Discount, ProductImage, Tag
+from store.models import Product, Offer, Category, Reviews, ProductImage, ProductStats, Tag
 from store.utils import import_logger
+from .category_tree import CategoryTreeService
+from .discount_engine import DiscountEngine
+from .offer_index import OfferIndexService
+from .pagination import KeysetPage, KeysetPaginator
+from .popular_tags import PopularTagsService
+from .product_search import ProductSearchService
+from .related_products import RelatedProductsService
 from .slugify import slugify
 from store.models import Orders
 
@@ -114,175 +122,15 @@ class DiscountProduct:
 
     def get_priority_discount(self, cart):
         """
-        Функция проверяет наличие скидки в корзине
+        Функция проверяет наличие скидки в корзине.
+        Скидки применяются по скомпилированному снимку DiscountEngine,
+        поэтому число запросов не зависит от количества товаров в корзине.
 
         :param cart: корзина с товарами
         :return: общая стоимость корзины
         """
 
-        discounts = Discount.objects.filter(is_active=True)
-        discounts_cart_priority = discounts.filter(name='DC', priority=True)
-        discounts_set_priority = discounts.filter(name='DS', priority=True)
-        discounts_cart = discounts.filter(name='DC', priority=False)
-        discounts_set = discounts.filter(name='DS', priority=False)
-        if discounts_cart_priority:
-            price = self.get_discount_on_cart(discounts_cart_priority, cart)
-            if price:
-                return price
-        elif discounts_set_priority:
-            price = self.get_discount_on_set(discounts_set_priority, cart)
-            if price:
-                return price
-        elif discounts_cart:
-            price = self.get_discount_on_cart(discounts_cart, cart)
-            if price:
-                return price
-        elif discounts_set:
-            price = self.get_discount_on_set(discounts_set, cart)
-            if price:
-                return price
-        return self.get_discount_on_product(cart)
-
-    @staticmethod
-    def calculate_price_with_discount(product, price) -> float:
-        """"
-       Функция расчитывает стоимость товара со скидкой
-
-       :param product: товар
-       :param price: цена продукта
-       :return: цена продукта со сидкой
-       """
-
-        finish_price = float(
-            product['product'].offers.first().unit_price
-        )
-        finish_price -= finish_price * (price / 100)
-        finish_price *= product['quantity']
-
-        return finish_price
-
-    @staticmethod
-    def total_price_cart(cart):
-        """"
-        Функция расчитывает стоимость карзины без скидки 'Скидки на товары'
-
-        :param cart: карзина с товарами
-        :return: стоимость карзины без скидок
-        """
-
-        cart_product = [crt for crt in cart]
-        price = sum([product['price'] * product['quantity'] for product in cart_product])
-        return price
-
-    @staticmethod
-    def discount_ids(discount):
-        """
-        Функция для получения списка id товаров в скидке
-        """
-
-        discount_products = discount.products.all()
-        return [product.id for product in discount_products]
-
-    @staticmethod
-    def categories_ids(discount):
-        """
-        Функция для получения списка id категорий в скидке
-        """
-
-        discount_products = discount.categories.all()
-        return [category.id for category in discount_products]
-
-    def get_discount_on_cart(self, discounts, cart):
-        """
-        Функция расчитывает стоимость карзины со скидкой 'Скидки на корзину'
-
-        :param discounts: список скидок 'Скидки на корзину'
-        :param cart: карзина с товарами
-        :return: стоимость карзины со скидкой 'Скидки на корзину'
-        """
-
-        total_products = len(cart)
-        total_price = self.total_price_cart(cart)
-        for discount in discounts:
-            total_discount_products = discount.total_products
-            if (total_discount_products == total_products
-                    and discount.sum_cart <= total_price):
-                if discount.sum_discount >= 1:
-                    return discount.sum_discount
-
-    def get_discount_on_set(self, discounts, cart):
-        """
-        Функция расчитывает стоимость карзины со скидкой 'Скидки на наборы'
-
-        :param discounts: список скидок 'Скидки на наборы'
-        :param cart: карзина с товарами
-        :return: стоимость карзины со скидкой 'Скидки на наборы'
-        """
-
-        cart_id = [crt['product'].id for crt in cart]
-        cart_categories_id = [crt['product'].category.id for crt in cart]
-        for discount in discounts:
-            product_ids = self.discount_ids(discount)
-            category_ids = self.categories_ids(discount)
-            if (str(product_ids)[1:-1] in str(cart_id)[1:-1]
-                    and str(category_ids)[1:-1] in str(cart_categories_id)[1:-1]):
-                price = self.total_price_cart(cart)
-                price -= Decimal(discount.sum_discount)
-
-                return 1 if price <= 1 else price
-
-    def get_discount_on_product(self, cart):
-        """
-       Функция расчитывает стоимость карзины со скидкой 'Скидки на товар'
-
-       :param cart: карзина с товарами
-       :return: стоимость карзины со скидкой 'Скидки на товар'
-       """
-
-        cart_product = [crt for crt in cart]
-        price = 0
-        for product in cart_product:
-            price += round(int(self.get_price_discount_on_product(product)), 2)
-        return price
-
-    def get_price_discount_on_product(self, product):
-        """
-        Функция применяет скидку 'Скидки на товар', если она есть
-        """
-
-        products = Product.objects.filter(discount__name='DP',
-                                          discount__is_active=True)
-        categories = Category.objects.filter(discount__name='DP',
-                                             discount__is_active=True)
-        if product['product'] in products:
-            return self.get_price_product(product)
-        elif product['product'].category in categories:
-            return self.get_price_categories(product)
-        else:
-            return product['total_price']
-
-    def get_price_product(self, product):
-        """
-        Функция для получения скидки на товар с учетом скидки 'Скидки на товар'
-        """
-
-        price = product['product'].discount.all().filter(
-            name='DP',
-        ).first().sum_discount
-        if 1 <= price <= 99:
-            return self.calculate_price_with_discount(product, price)
-
-    def get_price_categories(self, product):
-        """
-         Функция для получения скидки на товар с учетом скидки
-         'Скидки на товар', если товар относится к категории
-        """
-
-        price = (product['product'].category.discount.all()
-                 .filter(name='DP')
-                 .first().sum_discount)
-        if 1 <= price <= 99:
-            return self.calculate_price_with_discount(product, price)
+        return DiscountEngine().get_total_price(cart)
 
 
 class PaymentService:
@@ -306,9 +154,14 @@ class PaymentService:
             if order.status_exception:
                 order.status_exception = ''
 
+            was_paid = order.status == Orders.Status.PAID
             order.status = 1
             order.save()
 
+            if not was_paid:
+                PopularTagsService().register_paid_order(order)
+                RelatedProductsService().register_paid_order(order)
+
         else:
             Orders.objects.filter(id=self._order_id).update(status=2, status_exception=result)
 
@@ -343,97 +196,6 @@ class FakePaymentService:
             return choice(self.EXCEPTIONS)
 
 
-class ProductsViewService:
-    """
-    Сервис просмотренных товаров
-    """
-
-    LIMIT_PRODUCTS = 20
-
-    def __init__(self, request: HttpRequest):
-        self._request = request
-
-    def get_cached_products_id(self) -> list:
-        """
-        Получить список id продуктов из кэша
-        """
-
-        viewed = self._request.session.get('products_viewed')
-
-        return viewed
-
-    def get_viewed_product_list(self) -> list:
-        """
-        Получить список просмотренных продуктов
-        """
-
-        viewed_list = []
-        viewed = self.get_cached_products_id()
-
-        if viewed:
-            products = Product.objects.filter(id__in=viewed)
-
-            if products:
-                products_dict = {product.id: product for product in products}
-                viewed_list = [products_dict.get(product) for product in viewed]
-
-        return viewed_list
-
-    def add_product_to_viewed(self, product_id: int):
-        """
-        Добавляет id продукта в список просмотренных, который хранится в сессии.
-        Если список просмотренных заполнен(равен 20) - удаляет из него самый старый просмотр.
-        Если продукт уже есть в этом списке - передвигает его на место последнего просмотра.
-        """
-
-        viewed = self.get_cached_products_id()
-
-        if viewed:
-            full_list = len(viewed) == self.LIMIT_PRODUCTS
-            if full_list:
-                viewed.pop(0)
-
-            if self._is_product_in_viewed_list(product_id):
-                viewed = self._remove_product_from_viewed(product_id)
-
-            viewed.append(product_id)
-            self._request.session['products_viewed'] = viewed
-
-        else:
-            self._request.session['products_viewed'] = [product_id]
-
-    def _remove_product_from_viewed(self, product_id: int) -> list:
-        """
-        Удалить продукт из списка просмотренных продуктов
-        """
-
-        viewed = self.get_cached_products_id()
-        viewed.remove(product_id)
-
-        return viewed
-
-    def _is_product_in_viewed_list(self, product_id: int) -> bool:
-        """
-        Проверить есть ли продукт в списке просмотренных продуктов
-        """
-
-        viewed = self.get_cached_products_id()
-
-        return product_id in viewed
-
-    def _count_viewed_product(self) -> int:
-        """
-        Получить количество просмотренных продуктов
-        """
-
-        viewed = self.get_cached_products_id()
-        if viewed:
-            count = len(viewed)
-            return count
-
-        return 0
-
-
 class ProductService:
     """
     Сервис по работе с продуктами
@@ -482,26 +244,7 @@ class ProductService:
         Получает характеристики продукта
         """
 
-        from compare.services import get_characteristic_from_common_info, return_model
-
-        try:
-            id_model_characteristics = self._product.feature.values()[0].get('id')
-            general_characteristics = get_characteristic_from_common_info(self._product.feature.values()[0])
-            try:
-                model_info = return_model(self._product, id_model_characteristics)
-
-            except ObjectDoesNotExist:
-                model_info = None
-
-            feature = {
-                'characteristics': general_characteristics,
-                'product_characteristic_list': model_info,
-            }
-
-            return feature
-
-        except IndexError:
-            return {}
+        return registry.get_characteristics([self._product]).get(self._product.id, {})
 
 
 class CategoryServices:
@@ -517,9 +260,7 @@ class CategoryServices:
 
         products = Product.objects.filter(availability=True)
         if category_slug:
-            category = get_object_or_404(Category, slug=category_slug)
-            sub_categories = category.get_descendants(include_self=True)
-            products = products.filter(category__in=sub_categories)
+            products = CategoryTreeService().filter_products(products, category_slug)
 
         return products
 
@@ -531,7 +272,8 @@ class CatalogService:
 
     def catalog_processing(self, request, filterset):
         """
-        Функция сортирует переданные товары и фильтрует по тегу
+        Функция сортирует переданные товары и фильтрует по тегу.
+        Без явной сортировки результаты поиска по названию упорядочиваются по релевантности
 
         :param request: объект запроса
         :param filterset: объект ProductFilter
@@ -549,38 +291,25 @@ class CatalogService:
                 request.GET.get('sorting'),
                 filterset.queryset
             )
+        elif request.GET.get('name', '').strip():
+            filterset.queryset = ProductSearchService().rank(
+                filterset.queryset,
+                request.GET.get('name').strip()
+            ).order_by('-rank')
 
         return filterset
 
     @staticmethod
     def filter_products_by_name(queryset: Product.objects, name: str, value: str) -> Product.objects:
         """
-        Функция фильтрует товары по имени
-
-        :param queryset: Product objects
-        :param name: имя поля фильтра
-        :param value: значения поля
-        """
-
-        return queryset.filter(name__icontains=value)
-
-    @staticmethod
-    def filter_by_price(queryset: Product.objects, name: str, value: str) -> Product.objects:
-        """
-        Функция фильтрует товары по цене
+        Функция выполняет полнотекстовый поиск товаров по названию, описанию и характеристикам
 
         :param queryset: Product objects
         :param name: имя поля фильтра
         :param value: значения поля
         """
 
-        range_list = value.split(';')
-        min_price, max_price = int(range_list[0]), int(range_list[1])
-        offers = Offer.objects.filter(
-            unit_price__range=(min_price, max_price),
-        )
-
-        return queryset.filter(id__in=offers.values_list('product_id', flat=True))
+        return ProductSearchService().search(queryset, value)
 
     @staticmethod
     def filter_by_availability(queryset: Product.objects, name: str, value: str) -> Product.objects:
@@ -595,50 +324,43 @@ class CatalogService:
         return queryset.filter(availability=value)
 
     @staticmethod
-    def filter_by_delivery(queryset: Product.objects, name: str, value: str) -> Product.objects:
+    def filter_by_offers(queryset: Product.objects, price: str = None, sellers=None,
+                         delivery: str = None) -> Product.objects:
         """
-        Функция фильтрует товары по способу доставки
+        Функция фильтрует товары по цене, продавцам и способу доставки одним условием:
+        у товара должно быть предложение, подходящее под все переданные значения
 
         :param queryset: Product objects
-        :param name: имя поля фильтра
-        :param value: значения поля
+        :param price: диапазон цен в формате 'мин;макс'
+        :param sellers: продавцы
+        :param delivery: 'False' - экспресс-доставка, иначе обычная доставка
         """
 
-        delivery_type = 1
-
-        if value == 'False':
-            delivery_type = 2
-
-        return queryset.filter(offers__seller__store_settings__delivery_type=delivery_type)
+        price_range = delivery_type = None
 
-    @staticmethod
-    def filter_by_stores(queryset: Product.objects, name: str, value: str) -> Product.objects:
-        """
-        Функция фильтрует товары по продавцу
-
-        :param queryset: Product objects
-        :param name: имя поля фильтра
-        :param value: значения поля
-        """
+        if price:
+            range_list = price.split(';')
+            price_range = int(range_list[0]), int(range_list[1])
 
-        if value:
-            offers = Offer.objects.filter(seller__in=value)
+        if delivery:
+            delivery_type = 1
 
-            return queryset.filter(id__in=offers.values_list('product_id', flat=True))
+            if delivery == 'False':
+                delivery_type = 2
 
-        return queryset
+        return OfferIndexService.filter_products(queryset, price_range, sellers, delivery_type)
 
     @staticmethod
     def filter_by_feature(queryset: Product.objects, name: str, value: str) -> Product.objects:
         """
-        Функция фильтрует товары по характеристикам
+        Функция выполняет полнотекстовый поиск товаров по характеристикам
 
         :param queryset: Product objects
         :param name: имя поля фильтра
         :param value: значения поля
         """
 
-        return queryset.filter(feature__icontains=value)
+        return ProductSearchService().search_by_feature(queryset, value)
 
     @staticmethod
     def _filter_by_tags(queryset: Product.objects, value: str) -> Product.objects:
@@ -652,18 +374,12 @@ class CatalogService:
         return queryset.filter(tags__name=value)
 
     @staticmethod
-    def get_popular_tags():
+    def get_popular_tags() -> list[str]:
         """
-        Функция отбирает популярные теги по частоте купленных товаров
+        Функция возвращает названия популярных тегов по частоте купленных товаров
         """
 
-        tags = Tag.objects.annotate(
-            count=Count(Case(
-                When(products__orders__status=True, then=1),
-            ))
-        ).order_by('-count')
-
-        return tags
+        return PopularTagsService().get_top()
 
     def _sorting_products(self, sorting: str, queryset: Product.objects) -> Product.objects:
         """
@@ -700,9 +416,7 @@ class CatalogService:
             ordering = '-count'
 
         products = products.annotate(
-            count=Count(Case(
-                When(orders__status=True, then=1),
-            ))
+            count=Coalesce('stats__paid_orders', 0)
         ).order_by(ordering)
 
         return products
@@ -721,7 +435,7 @@ class CatalogService:
             ordering = '-avg'
 
         products = products.annotate(
-            avg=Avg('offers__unit_price')
+            avg=Coalesce('stats__avg_price', Decimal(0))
         ).order_by(ordering)
 
         return products
@@ -740,7 +454,7 @@ class CatalogService:
             ordering = '-count'
 
         products = products.annotate(
-            count=Count('reviews')
+            count=Coalesce('stats__reviews_count', 0)
         ).order_by(ordering)
 
         return products
@@ -768,6 +482,8 @@ class ReviewsProduct:
     Сервис для добавления отзыва к товару
     """
 
+    PAGE_SIZE = 3
+
     @staticmethod
     def add_review_to_product(request, form, slug) -> None:
         # добавить отзыв к товару
@@ -778,22 +494,33 @@ class ReviewsProduct:
         rew.author = Profile.objects.get(user__id=request.user.id)
         rew.save()
 
-    @staticmethod
-    def get_list_of_product_reviews(product):
-        # получить список отзывов к товару
-        reviews = Reviews.objects.all().filter(product=product).order_by('-created_at')
-        for review in reviews:
-            review.created_at = review.created_at.strftime('%b %d / %Y / %H:%M')
+    @classmethod
+    def get_reviews_page(cls, product, cursor: str = None) -> KeysetPage:
+        # получить страницу отзывов к товару, начиная с самых новых
+        reviews = Reviews.objects.filter(
+            product=product,
+        ).select_related('author__user').order_by('-created_at', '-id')
 
-        return reviews[0:3], reviews
+        return KeysetPaginator(reviews, cls.PAGE_SIZE).get_page(cursor)
 
     @staticmethod
     def get_number_of_reviews_for_product(product) -> int:
-        # получить количество отзывов для товара
-        num_reviews = len(Reviews.objects.all().filter(product=product))
+        # получить количество отзывов для товара из таблицы агрегатов
+        num_reviews = ProductStats.objects.filter(product=product).values_list('reviews_count', flat=True).first()
+        if num_reviews is None:
+            return Reviews.objects.filter(product=product).count()
 
         return num_reviews
 
+    @staticmethod
+    def get_review_data(review: Reviews) -> dict:
+        # получить данные отзыва для JSON ответа
+        return {
+            'author': str(review.author),
+            'created_at': date_format(localtime(review.created_at), 'M d / Y / H:i'),
+            'comment_text': review.comment_text,
+        }
+
 
 class GetParamService:
     """
@@ -1042,28 +769,9 @@ class ImportProductService:
 
         feature_data['object_id'] = product.id
         feature_data['content_type_id'] = product.feature.core_filters.get('content_type__pk')
-        category_name = category.name.lower()
-
-        if category_name == 'телевизоры':
-            TVSetCharacteristic.objects.create(**feature_data)
-        elif category_name == 'наушники':
-            HeadphonesCharacteristic.objects.create(**feature_data)
-        elif category_name == 'мобильные телефоны':
-            MobileCharacteristic.objects.create(**feature_data)
-        elif category_name == 'стиральные машины':
-            WashMachineCharacteristic.objects.create(**feature_data)
-        elif category_name == 'фотоаппараты':
-            PhotoCamCharacteristic.objects.create(**feature_data)
-        elif category_name == 'ноутбуки':
-            NotebookCharacteristic.objects.create(**feature_data)
-        elif category_name == 'электроника':
-            ElectroCharacteristic.objects.create(**feature_data)
-        elif category_name == 'микроволновые печи':
-            MicrowaveOvenCharacteristic.objects.create(**feature_data)
-        elif category_name == 'кухонная техника':
-            KitchenCharacteristic.objects.create(**feature_data)
-        elif category_name == 'торшеры':
-            TorchereCharacteristic.objects.create(**feature_data)
+        model = registry.get_model(category)
+        if model is not None:
+            model.objects.create(**feature_data)
 
     @staticmethod
     def create_offer(offer: dict, seller_name: str, product: Product) -> str:
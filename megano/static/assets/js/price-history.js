@@ -0,0 +1,71 @@
+'use strict';
+// График истории цены на странице товара: полоса от минимальной до максимальной цены и линия средней цены
+(function () {
+    var chart = document.getElementById('price-history-chart'),
+        empty = document.getElementById('price-history-empty'),
+        svg = 'http://www.w3.org/2000/svg';
+
+    if (!chart) return;
+
+    function draw(series) {
+        var width = 600, height = 200, padding = 10,
+            prices = [];
+
+        series = series.filter(function (point) {
+            return point.avg_price !== null;
+        });
+
+        series.forEach(function (point) {
+            [point.min_price, point.max_price, point.avg_price].forEach(function (price) {
+                if (price !== null) prices.push(parseFloat(price));
+            });
+        });
+        if (!prices.length) {
+            chart.remove();
+            empty.hidden = false;
+            return;
+        }
+
+        var low = Math.min.apply(null, prices),
+            high = Math.max.apply(null, prices),
+            range = high - low || 1,
+            step = series.length > 1 ? (width - 2 * padding) / (series.length - 1) : 0;
+
+        function x(index) {
+            return padding + index * step;
+        }
+
+        function y(price) {
+            return height - padding - (parseFloat(price) - low) / range * (height - 2 * padding);
+        }
+
+        var band = series.map(function (point, index) {
+            return x(index) + ',' + y(point.max_price || point.avg_price);
+        }).concat(series.slice().reverse().map(function (point, index) {
+            return x(series.length - 1 - index) + ',' + y(point.min_price || point.avg_price);
+        }));
+        var line = series.map(function (point, index) {
+            return x(index) + ',' + y(point.avg_price);
+        });
+
+        var area = document.createElementNS(svg, 'polygon');
+        area.setAttribute('points', band.join(' '));
+        area.setAttribute('fill', 'rgba(0, 145, 234, 0.15)');
+        chart.appendChild(area);
+
+        var path = document.createElementNS(svg, 'polyline');
+        path.setAttribute('points', line.join(' '));
+        path.setAttribute('fill', 'none');
+        path.setAttribute('stroke', '#0091ea');
+        path.setAttribute('stroke-width', '2');
+        chart.appendChild(path);
+    }
+
+    fetch(chart.dataset.url, {headers: {'Accept': 'application/json'}})
+        .then(function (response) {
+            return response.json();
+        })
+        .then(function (data) {
+            draw(data.results);
+        });
+})();
@@ -0,0 +1,48 @@
+'use strict';
+// Подгрузка следующих страниц отзывов на странице товара
+(function () {
+    var more = document.getElementById('reviews-more'),
+        list = document.getElementById('reviews-list');
+
+    if (!more || !list) return;
+
+    function addReview(review) {
+        var comment = document.createElement('div');
+        comment.className = 'Comment';
+        comment.innerHTML =
+            '<div class="Comment-column Comment-column_pict"><div class="Comment-avatar"></div></div>' +
+            '<div class="Comment-column">' +
+            '<header class="Comment-header"><div>' +
+            '<strong class="Comment-title"></strong><span class="Comment-date"></span>' +
+            '</div></header>' +
+            '<div class="Comment-content"></div>' +
+            '</div>';
+        comment.querySelector('.Comment-title').textContent = review.author;
+        comment.querySelector('.Comment-date').textContent = review.created_at;
+        comment.querySelector('.Comment-content').textContent = review.comment_text;
+        list.appendChild(comment);
+    }
+
+    more.addEventListener('click', function (event) {
+        event.preventDefault();
+        var url = more.dataset.url;
+        if (!url) return;
+
+        more.dataset.url = '';
+        fetch(url, {headers: {'Accept': 'application/json'}})
+            .then(function (response) {
+                return response.json();
+            })
+            .then(function (data) {
+                data.results.forEach(addReview);
+                if (data.next) {
+                    more.dataset.url = data.next;
+                } else {
+                    more.remove();
+                }
+            })
+            .catch(function () {
+                more.dataset.url = url;
+            });
+    });
+})();
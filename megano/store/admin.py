@@ -5,7 +5,7 @@ from django.contrib import admin, messages
 
 from django.shortcuts import reverse, render, redirect
 from django.urls import path
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from django.utils.translation import gettext_lazy as _
 
 from django.core.cache import cache
@@ -16,6 +16,8 @@ from django.db.models import QuerySet
 from django.http import HttpRequest, HttpResponse
 
 from cart.models import Cart
+from services.image_variants import ImageVariantService
+from services.price_history import PriceHistoryService
 from store.tasks import import_product
 from .forms import JSONImportForm
 from .models import (Banners,
@@ -108,7 +110,8 @@ class AdminBanner(admin.ModelAdmin):
         """
 
         if obj.product:
-            return mark_safe(f'<img src="{obj.product.preview.url}" alt=""width="60">')
+            url = ImageVariantService.get_url(obj.product.preview, obj.product.preview_variants, 60)
+            return mark_safe(f'<img src="{url}" alt=""width="60">')
         else:
             return 'not url'
 
@@ -282,7 +285,7 @@ class AdminProduct(admin.ModelAdmin):
     ordering = ['pk', 'availability', 'name', 'created_at']
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
-    readonly_fields = ['created_time', 'update_time']
+    readonly_fields = ['created_time', 'update_time', 'price_history']
     save_on_top = True
 
     fieldsets = [
@@ -296,6 +299,10 @@ class AdminProduct(admin.ModelAdmin):
             'fields': ('limited_edition', 'availability', 'slug',),
             "classes": ("collapse",),
         }),
+        (_('История цены'), {
+            'fields': ('price_history',),
+            "classes": ("collapse",),
+        }),
     ]
 
     def get_queryset(self, request):
@@ -323,10 +330,35 @@ class AdminProduct(admin.ModelAdmin):
         link = reverse('admin:store_category_change', args=(obj.category.id,))
         return format_html('<a href="{}">{}</a>', link, obj.category.name)
 
+    def price_history(self, obj: Product) -> str:
+        """
+        Функция выводит график средней цены товара за полгода по дневным агрегатам
+        """
+
+        if not obj.pk:
+            return '-'
+
+        series = [point for point in PriceHistoryService().get_series(obj.pk, 180, 60) if point['avg_price']]
+        if not series:
+            return '-'
+
+        prices = [float(point['avg_price']) for point in series]
+        low, high = min(prices), max(prices)
+        step = 400 / max(len(prices) - 1, 1)
+        scale = 80 / ((high - low) or 1)
+        points = ' '.join(f'{index * step:.1f},{90 - (price - low) * scale:.1f}' for index, price in enumerate(prices))
+
+        return format_html(
+            '<svg width="400" height="100"><polyline points="{}" fill="none" stroke="#417690" stroke-width="2"/></svg>'
+            '<div>{} - {}: {} - {}</div>',
+            points, series[0]['date'], series[-1]['date'], low, high,
+        )
+
     description_short.short_description = _('Описание')
     created_time.short_description = _('Создан')
     update_time.short_description = _('Отредактирован')
     category_url.short_description = _('Категория')
+    price_history.short_description = _('История цены')
 
     # def get_actions(self, request):
     #     """"
@@ -414,6 +446,7 @@ class OfferAdmin(admin.ModelAdmin):
     list_display_links = ['pk', 'seller']
     ordering = ['pk', 'unit_price', 'amount']
     search_fields = ['product', 'seller', 'unit_price', 'amount']
+    readonly_fields = ['price_history']
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == 'seller':
@@ -424,7 +457,28 @@ class OfferAdmin(admin.ModelAdmin):
         link = reverse('admin:store_product_change', args=(obj.product.id,))
         return format_html('<a href="{}">{}</a>', link, obj.product.name)
 
+    def price_history(self, obj: Offer) -> str:
+        """
+        Функция выводит последние изменения цены и остатка предложения
+        """
+
+        if not obj.pk:
+            return '-'
+
+        return format_html(
+            '<table>{}</table>',
+            format_html_join(
+                '',
+                '<tr><td>{}</td><td>{}</td><td>{}</td></tr>',
+                (
+                    (changed_at.strftime('%d.%m.%Y %H:%M'), price, amount)
+                    for changed_at, price, amount in reversed(PriceHistoryService().get_offer_history(obj.pk))
+                ),
+            ),
+        )
+
     product_url.short_description = _('Товар')
+    price_history.short_description = _('История цены')
 
 
 class ProductInline(admin.TabularInline):
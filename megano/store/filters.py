@@ -42,13 +42,11 @@ class ProductFilter(django_filters.FilterSet):
             'data-min': '0',
             'data-max': '1000',
         }),
-        method=CatalogService().filter_by_price,
     )
     profile = django_filters.ModelMultipleChoiceFilter(
         label=_('Продавцы'),
         queryset=Profile.objects.filter(role='store'),
         widget=CustomCheckboxMultiple(),
-        method=CatalogService().filter_by_stores,
     )
     availability = django_filters.TypedChoiceFilter(
         label=_('Только товары в наличии'),
@@ -60,7 +58,6 @@ class ProductFilter(django_filters.FilterSet):
         label=_('С бесплатной доставкой'),
         choices=CHOICES,
         widget=CustomRadioSelect(),
-        method=CatalogService().filter_by_delivery,
     )
     feature = django_filters.CharFilter(
         label=_('Характеристика'),
@@ -72,3 +69,37 @@ class ProductFilter(django_filters.FilterSet):
         }),
         method=CatalogService().filter_by_feature,
     )
+
+    # Фильтры по предложениям не применяются по отдельности: filter_queryset передает их значения
+    # в CatalogService.filter_by_offers, который строит по ним одно условие по индексу предложений
+    OFFER_FILTERS = {
+        'range': 'price',
+        'profile': 'sellers',
+        'delivery_free': 'delivery',
+    }
+
+    def filter_queryset(self, queryset):
+        """
+        Фильтры по цене, продавцам и доставке объединяются в одно условие по индексу предложений,
+        остальные фильтры применяются по очереди
+        """
+
+        offer_filters = {}
+        for name, value in self.form.cleaned_data.items():
+            if name in self.OFFER_FILTERS:
+                offer_filters[self.OFFER_FILTERS[name]] = value
+            else:
+                queryset = self.filters[name].filter(queryset, value)
+
+        return CatalogService.filter_by_offers(queryset, **offer_filters)
+
+    def set_facets(self, facets: dict) -> None:
+        """
+        Передает количество товаров из фасетов в виджеты формы фильтра
+        """
+
+        total = sum(facets['availability'].values())
+        fields = self.form.fields
+        fields['profile'].widget.facet_counts = facets['sellers']
+        fields['availability'].widget.facet_counts = {**facets['availability'], '': total}
+        fields['delivery_free'].widget.facet_counts = {**facets['delivery'], '': total}
@@ -0,0 +1,49 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from services.discount_engine import DiscountEngine
+from store.models import Product
+
+
+class Command(BaseCommand):
+    """
+    Класс позволяет проверить время расчета скидок корзины и количество запросов к базе.
+    Корзины собираются из существующих товаров.
+    Пример: python manage.py benchmark_cart_discounts --sizes 1 10 100 --repeat 100
+    """
+    help = "Замеряет время расчета скидок корзины разного размера"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[1, 10, 100])
+        parser.add_argument('--repeat', type=int, default=100)
+
+    def handle(self, *args, **options):
+        engine = DiscountEngine()
+        products = list(Product.objects.order_by('id')[:max(options['sizes'])])
+        if not products:
+            self.stdout.write('Нет товаров для корзины.')
+            return
+
+        with CaptureQueriesContext(connection) as queries:
+            engine.get_snapshot()
+        self.stdout.write(f'Снимок скидок: {len(queries)} запросов.')
+
+        for size in options['sizes']:
+            lines = [
+                {'product': product, 'price': Decimal(100), 'quantity': 1, 'total_price': Decimal(100)}
+                for product in products[:size]
+            ]
+
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                for _ in range(options['repeat']):
+                    engine.get_total_price(lines)
+                elapsed = (time.perf_counter() - start) / options['repeat']
+
+            self.stdout.write(
+                f'Товаров в корзине: {len(lines)}, запросов: {len(queries)}, время: {elapsed * 1000:.3f} мс'
+            )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from services.image_variants import ImageVariantService
+
+
+class Command(BaseCommand):
+    """
+    Класс позволяет создать копии изображений товаров, загруженных до появления копий.
+    Пример: python manage.py generate_image_variants
+    """
+    help = "Создает недостающие копии изображений товаров в WebP и JPEG"
+
+    def handle(self, *args, **options):
+        count = ImageVariantService().rebuild()
+        self.stdout.write(f'Проверено {count} изображений.')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from services.effective_price import EffectivePriceService
+
+
+class Command(BaseCommand):
+    """
+    Класс позволяет полностью перестроить таблицу цен предложений со скидкой.
+    Пример: python manage.py rebuild_effective_prices
+    """
+    help = "Полностью перестраивает цены предложений с учетом действующих скидок"
+
+    def handle(self, *args, **options):
+        count = EffectivePriceService().rebuild()
+        self.stdout.write(f'Цены со скидкой пересчитаны для {count} товаров.')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from services.offer_index import OfferIndexService
+
+
+class Command(BaseCommand):
+    """
+    Класс позволяет полностью перестроить индекс предложений.
+    Пример: python manage.py rebuild_offer_index
+    """
+    help = "Полностью перестраивает индекс предложений для фильтрации каталога"
+
+    def handle(self, *args, **options):
+        count = OfferIndexService().rebuild()
+        self.stdout.write(f'Индекс перестроен для {count} предложений.')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from services.category_prices import CategoryPriceService
+from services.product_stats import ProductStatsService
+
+
+class Command(BaseCommand):
+    """
+    Класс позволяет полностью перестроить таблицу агрегатов товаров.
+    Пример: python manage.py rebuild_product_stats
+    """
+    help = "Полностью перестраивает агрегаты товаров для сортировки и фильтрации каталога и цены категорий"
+
+    def handle(self, *args, **options):
+        count = ProductStatsService().rebuild()
+        self.stdout.write(f'Агрегаты пересчитаны для {count} товаров.')
+
+        count = CategoryPriceService().rebuild()
+        self.stdout.write(f'Цены пересчитаны для {count} категорий.')
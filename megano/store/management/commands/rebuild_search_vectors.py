@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from services.product_search import ProductSearchService
+
+
+class Command(BaseCommand):
+    """
+    Класс позволяет пересчитать поисковые векторы всех товаров.
+    Пример: python manage.py rebuild_search_vectors
+    """
+    help = "Пересчитывает поисковые векторы товаров для полнотекстового поиска"
+
+    def handle(self, *args, **options):
+        count = ProductSearchService().rebuild()
+        self.stdout.write(f'Поисковые векторы пересчитаны для {count} товаров.')
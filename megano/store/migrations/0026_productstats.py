@@ -0,0 +1,75 @@
+# Generated by Django 4.2.6 on 2026-10-17 12:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Avg, Count, Max, Min, Sum
+
+
+def fill_product_stats(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    Offer = apps.get_model('store', 'Offer')
+    Orders = apps.get_model('store', 'Orders')
+    Reviews = apps.get_model('store', 'Reviews')
+    ProductStats = apps.get_model('store', 'ProductStats')
+
+    prices = {
+        row['product_id']: row
+        for row in Offer.objects.values('product_id').annotate(
+            min_price=Min('unit_price'),
+            avg_price=Avg('unit_price'),
+            max_price=Max('unit_price'),
+            total_amount=Sum('amount'),
+        ).order_by()
+    }
+    paid_orders = dict(
+        Orders.products.through.objects.filter(orders__status=1).values('product_id').annotate(
+            count=Count('orders_id'),
+        ).values_list('product_id', 'count').order_by()
+    )
+    reviews = dict(
+        Reviews.objects.values('product_id').annotate(count=Count('id')).values_list('product_id', 'count').order_by()
+    )
+
+    stats = []
+    for product_id in Product.objects.values_list('id', flat=True):
+        row = prices.get(product_id, {})
+        stats.append(ProductStats(
+            product_id=product_id,
+            min_price=row.get('min_price'),
+            avg_price=round(row['avg_price'], 2) if row.get('avg_price') is not None else None,
+            max_price=row.get('max_price'),
+            paid_orders=paid_orders.get(product_id, 0),
+            reviews_count=reviews.get(product_id, 0),
+            total_amount=row.get('total_amount') or 0,
+        ))
+
+    ProductStats.objects.bulk_create(stats, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0025_banners_description_en_banners_description_ru_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductStats',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='store.product', verbose_name='Товар')),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='Минимальная цена')),
+                ('avg_price', models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=8, null=True, verbose_name='Средняя цена')),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='Максимальная цена')),
+                ('paid_orders', models.PositiveIntegerField(db_index=True, default=0, verbose_name='Оплаченные заказы')),
+                ('reviews_count', models.PositiveIntegerField(db_index=True, default=0, verbose_name='Количество отзывов')),
+                ('total_amount', models.PositiveIntegerField(default=0, verbose_name='Остаток на складах')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Статистика товара',
+                'verbose_name_plural': 'Статистика товаров',
+                'db_table': 'ProductStats',
+            },
+        ),
+        migrations.RunPython(fill_product_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.6 on 2026-10-17 12:09
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SKIPPED_FEATURE_FIELDS = ('id', 'content_type', 'object_id', 'abstractcharacteristicmodel_ptr')
+CONFIGS = {'ru': 'russian', 'en': 'english'}
+
+
+def fill_search_vectors(apps, schema_editor):
+    quote = schema_editor.quote_name
+    Product = apps.get_model('store', 'Product')
+    Parent = apps.get_model('compare', 'AbstractCharacteristicModel')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+
+    features = []
+    for model in apps.get_app_config('compare').get_models():
+        if model is Parent:
+            continue
+        columns = [
+            f'{quote("c" if field.model is model else "a")}.{quote(field.column)}::text'
+            for field in model._meta.concrete_fields
+            if field.name not in SKIPPED_FEATURE_FIELDS
+        ]
+        features.append(
+            f'SELECT a.object_id, concat_ws(\' \', {", ".join(columns)}) AS text '
+            f'FROM {quote(model._meta.db_table)} c '
+            f'JOIN {quote(Parent._meta.db_table)} a ON a.id = c.{quote("abstractcharacteristicmodel_ptr_id")} '
+            f'JOIN {quote(ContentType._meta.db_table)} t ON t.id = a.content_type_id AND t.app_label = \'store\' AND t.model = \'product\''
+        )
+
+    features_text = (
+        f'(SELECT string_agg(f.text, \' \') FROM features f WHERE f.object_id = p.id)'
+        if features else 'NULL'
+    )
+    vectors = [
+        f"setweight(to_tsvector('{config}', coalesce(p.name_{language}, '')), 'A')"
+        f" || setweight(jsonb_to_tsvector('{config}', coalesce(p.description_ru, '{{}}'), '[\"string\"]'), 'B')"
+        f" || setweight(jsonb_to_tsvector('{config}', coalesce(p.description_en, '{{}}'), '[\"string\"]'), 'B')"
+        f" || setweight(to_tsvector('{config}', coalesce({features_text}, '')), 'C')"
+        for language, config in CONFIGS.items()
+    ]
+
+    schema_editor.execute(
+        (f'WITH features AS ({" UNION ALL ".join(features)}) ' if features else '')
+        + f'UPDATE {quote(Product._meta.db_table)} p SET search_vector = {" || ".join(vectors)}'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0026_productstats'),
+        ('compare', '0003_alter_abstractcharacteristicmodel_options_and_more'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='products_search_vector_gin'),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
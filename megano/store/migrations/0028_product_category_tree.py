@@ -0,0 +1,40 @@
+# Generated by Django 4.2.6 on 2026-10-17 12:13
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_product_category_tree(apps, schema_editor):
+    Category = apps.get_model('store', 'Category')
+    Product = apps.get_model('store', 'Product')
+    categories = Category.objects.filter(id=OuterRef('category_id'))
+
+    Product.objects.update(
+        category_tree_id=Subquery(categories.values('tree_id')[:1]),
+        category_lft=Subquery(categories.values('lft')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0027_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='category_lft',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Положение категории в дереве'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='category_tree_id',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Дерево категории'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category_tree_id', 'category_lft'], name='products_category_tree_idx'),
+        ),
+        migrations.RunPython(fill_product_category_tree, migrations.RunPython.noop),
+    ]
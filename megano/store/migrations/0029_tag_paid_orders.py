@@ -0,0 +1,32 @@
+# Generated by Django 4.2.6 on 2026-10-17 12:14
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_tag_paid_orders(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    Tag = apps.get_model('store', 'Tag')
+    paid_orders = Product.tags.through.objects.filter(
+        tag_id=OuterRef('pk'),
+        product__orders__status=1,
+    ).values('tag_id').annotate(count=Count('*')).values('count')
+
+    Tag.objects.update(paid_orders=Coalesce(Subquery(paid_orders, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0028_product_category_tree'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='paid_orders',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Оплаченные заказы'),
+        ),
+        migrations.RunPython(fill_tag_paid_orders, migrations.RunPython.noop),
+    ]
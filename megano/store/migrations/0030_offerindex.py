@@ -0,0 +1,57 @@
+# Generated by Django 4.2.6 on 2026-10-17 12:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+
+def fill_offer_index(apps, schema_editor):
+    Offer = apps.get_model('store', 'Offer')
+    OfferIndex = apps.get_model('store', 'OfferIndex')
+    offers = Offer.objects.values(
+        'id', 'product_id', 'seller_id', 'unit_price', 'amount', 'seller__store_settings__delivery_type',
+    )
+
+    OfferIndex.objects.bulk_create(
+        [
+            OfferIndex(
+                offer_id=offer['id'],
+                product_id=offer['product_id'],
+                seller_id=offer['seller_id'],
+                unit_price=offer['unit_price'],
+                amount=offer['amount'],
+                delivery_type=offer['seller__store_settings__delivery_type'],
+            )
+            for offer in offers.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authorization', '0008_alter_profile_slug'),
+        ('store', '0029_tag_paid_orders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfferIndex',
+            fields=[
+                ('offer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_index', serialize=False, to='store.offer', verbose_name='Предложение')),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=8, verbose_name='Цена')),
+                ('amount', models.PositiveIntegerField(verbose_name='Количество')),
+                ('delivery_type', models.IntegerField(blank=True, null=True, verbose_name='Способ доставки')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offer_index', to='store.product', verbose_name='Товар')),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offer_index', to='authorization.profile', verbose_name='Продавец')),
+            ],
+            options={
+                'verbose_name': 'Индекс предложения',
+                'verbose_name_plural': 'Индекс предложений',
+                'db_table': 'OfferIndex',
+                'indexes': [models.Index(fields=['product', 'seller', 'delivery_type', 'unit_price'], name='offer_index_product_idx'), models.Index(fields=['seller', 'product'], name='offer_index_seller_idx')],
+            },
+        ),
+        migrations.RunPython(fill_offer_index, migrations.RunPython.noop),
+    ]
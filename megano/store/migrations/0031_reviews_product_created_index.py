@@ -0,0 +1,17 @@
+# Generated by Django 4.2.6 on 2026-10-17 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0030_offerindex'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reviews',
+            index=models.Index(fields=['product', '-created_at', '-id'], name='reviews_product_created_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.6 on 2026-10-17 12:26
+
+from django.db import migrations, models
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+import django.db.models.deletion
+
+
+def fill_related_products(apps, schema_editor):
+    Orders = apps.get_model('store', 'Orders')
+    RelatedProduct = apps.get_model('store', 'RelatedProduct')
+    rows = Orders.products.through.objects.filter(
+        orders__status=1,
+    ).annotate(
+        related_id=F('orders__products'),
+    ).exclude(
+        related_id=F('product_id'),
+    ).values('product_id', 'related_id').annotate(
+        score=Count('orders_id', distinct=True),
+    ).annotate(
+        rank=Window(RowNumber(), partition_by=F('product_id'), order_by=[F('score').desc(), F('related_id').asc()]),
+    ).filter(
+        rank__lte=8,
+    ).values('product_id', 'related_id', 'score')
+
+    RelatedProduct.objects.bulk_create(
+        RelatedProduct(product_id=row['product_id'], related_id=row['related_id'], score=row['score'])
+        for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0031_reviews_product_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveIntegerField(verbose_name='Совместные заказы')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_products', to='store.product', verbose_name='Товар')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.product', verbose_name='Рекомендуемый товар')),
+            ],
+            options={
+                'verbose_name': 'Рекомендуемый товар',
+                'verbose_name_plural': 'Рекомендуемые товары',
+                'db_table': 'RelatedProducts',
+                'indexes': [models.Index(fields=['product', '-score'], name='related_products_score_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='relatedproduct',
+            constraint=models.UniqueConstraint(fields=('product', 'related'), name='related_products_unique'),
+        ),
+        migrations.RunPython(fill_related_products, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.6 on 2026-10-17 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0032_related_products'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='preview_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Копии основного фото'),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Копии фотографии'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.6 on 2026-10-17 12:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+from decimal import Decimal
+
+
+def fill_effective_prices(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    Offer = apps.get_model('store', 'Offer')
+    EffectivePrice = apps.get_model('store', 'EffectivePrice')
+
+    def best_discounts(through, field):
+        best = {}
+        for object_id, discount_id, sum_discount in through.objects.filter(
+                discount__name='DP', discount__is_active=True,
+        ).order_by(field, '-discount__sum_discount', 'discount_id').values_list(
+            field, 'discount_id', 'discount__sum_discount',
+        ):
+            best.setdefault(object_id, (discount_id, sum_discount))
+        return best
+
+    product_discounts = best_discounts(Product.discount.through, 'product_id')
+    category_discounts = best_discounts(apps.get_model('store', 'Category').discount.through, 'category_id')
+    categories = dict(Product.objects.values_list('id', 'category_id'))
+
+    prices = []
+    for offer in Offer.objects.values('id', 'product_id', 'unit_price'):
+        discount_id, sum_discount = product_discounts.get(
+            offer['product_id'], category_discounts.get(categories.get(offer['product_id'])),
+        ) or (None, None)
+        if sum_discount is None or not 1 <= sum_discount <= 99:
+            discount_id, sum_discount, final_price = None, None, offer['unit_price']
+        else:
+            final_price = (offer['unit_price'] - offer['unit_price'] * Decimal(sum_discount / 100)).quantize(
+                Decimal('0.01'),
+            )
+        prices.append(EffectivePrice(
+            offer_id=offer['id'],
+            product_id=offer['product_id'],
+            base_price=offer['unit_price'],
+            discount_id=discount_id,
+            sum_discount=sum_discount,
+            final_price=final_price,
+        ))
+
+    EffectivePrice.objects.bulk_create(prices, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0033_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EffectivePrice',
+            fields=[
+                ('offer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='effective_price', serialize=False, to='store.offer', verbose_name='Предложение')),
+                ('base_price', models.DecimalField(decimal_places=2, max_digits=8, verbose_name='Цена')),
+                ('sum_discount', models.FloatField(blank=True, null=True, verbose_name='Сумма скидки')),
+                ('final_price', models.DecimalField(decimal_places=2, max_digits=8, verbose_name='Цена со скидкой')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('discount', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='store.discount', verbose_name='Скидка')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='effective_prices', to='store.product', verbose_name='Товар')),
+            ],
+            options={
+                'verbose_name': 'Цена со скидкой',
+                'verbose_name_plural': 'Цены со скидкой',
+                'db_table': 'EffectivePrices',
+                'indexes': [models.Index(fields=['product', 'final_price'], name='effective_price_product_idx')],
+            },
+        ),
+        migrations.RunPython(fill_effective_prices, migrations.RunPython.noop),
+    ]
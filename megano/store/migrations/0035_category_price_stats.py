@@ -0,0 +1,51 @@
+# Generated by Django 4.2.6 on 2026-10-17 12:38
+
+from django.db import migrations, models
+from django.db.models import Max, Min, OuterRef, Subquery
+import django.db.models.deletion
+
+
+def fill_category_price_stats(apps, schema_editor):
+    Category = apps.get_model('store', 'Category')
+    CategoryPriceStats = apps.get_model('store', 'CategoryPriceStats')
+    ProductStats = apps.get_model('store', 'ProductStats')
+
+    subtree_stats = ProductStats.objects.filter(
+        product__category_tree_id=OuterRef('tree_id'),
+        product__category_lft__gte=OuterRef('lft'),
+        product__category_lft__lt=OuterRef('rght'),
+    ).order_by().values('product__category_tree_id')
+    rows = Category.objects.order_by().annotate(
+        subtree_min_price=Subquery(subtree_stats.annotate(price=Min('min_price')).values('price')),
+        subtree_max_price=Subquery(subtree_stats.annotate(price=Max('max_price')).values('price')),
+    ).values_list('id', 'subtree_min_price', 'subtree_max_price')
+
+    CategoryPriceStats.objects.bulk_create(
+        CategoryPriceStats(category_id=category_id, min_price=min_price, max_price=max_price)
+        for category_id, min_price, max_price in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0034_effective_prices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryPriceStats',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='price_stats', serialize=False, to='store.category', verbose_name='Категория')),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='Минимальная цена')),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='Максимальная цена')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Цены категории',
+                'verbose_name_plural': 'Цены категорий',
+                'db_table': 'CategoryPriceStats',
+            },
+        ),
+        migrations.RunPython(fill_category_price_stats, migrations.RunPython.noop),
+    ]
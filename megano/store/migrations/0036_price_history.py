@@ -0,0 +1,106 @@
+# Generated by Django 4.2.6 on 2026-10-17 12:41
+
+from django.db import migrations, models
+from django.db.models import Avg, Max, Min, Sum
+from django.utils import timezone
+import django.db.models.deletion
+from decimal import Decimal
+
+
+def fill_price_history(apps, schema_editor):
+    Offer = apps.get_model('store', 'Offer')
+    OfferPriceHistory = apps.get_model('store', 'OfferPriceHistory')
+    ProductPriceDaily = apps.get_model('store', 'ProductPriceDaily')
+    now = timezone.now()
+
+    OfferPriceHistory.objects.bulk_create(
+        (
+            OfferPriceHistory(
+                offer_id=offer['id'],
+                product_id=offer['product_id'],
+                month=timezone.localdate(now).replace(day=1),
+                started_at=now,
+                start_price=offer['unit_price'],
+                start_amount=offer['amount'],
+                last_price=offer['unit_price'],
+                last_amount=offer['amount'],
+            )
+            for offer in Offer.objects.values('id', 'product_id', 'unit_price', 'amount')
+        ),
+        batch_size=1000,
+    )
+    ProductPriceDaily.objects.bulk_create(
+        (
+            ProductPriceDaily(
+                product_id=row['product_id'],
+                day=timezone.localdate(now),
+                min_price=row['min_price'],
+                max_price=row['max_price'],
+                avg_price=row['avg_price'].quantize(Decimal('0.01')),
+                amount=row['amount'] or 0,
+            )
+            for row in Offer.objects.values('product_id').annotate(
+                min_price=Min('unit_price'),
+                max_price=Max('unit_price'),
+                avg_price=Avg('unit_price'),
+                amount=Sum('amount'),
+            ).order_by()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0035_category_price_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductPriceDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='Минимальная цена')),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='Максимальная цена')),
+                ('avg_price', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='Средняя цена')),
+                ('amount', models.PositiveIntegerField(default=0, verbose_name='Остаток на складах')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_daily', to='store.product', verbose_name='Товар')),
+            ],
+            options={
+                'verbose_name': 'Цена товара за день',
+                'verbose_name_plural': 'Цены товаров по дням',
+                'db_table': 'ProductPriceDaily',
+            },
+        ),
+        migrations.CreateModel(
+            name='OfferPriceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Месяц')),
+                ('started_at', models.DateTimeField(verbose_name='Начало записи')),
+                ('start_price', models.DecimalField(decimal_places=2, max_digits=8, verbose_name='Начальная цена')),
+                ('start_amount', models.PositiveIntegerField(verbose_name='Начальный остаток')),
+                ('points', models.JSONField(default=list, verbose_name='Изменения')),
+                ('last_price', models.DecimalField(decimal_places=2, max_digits=8, verbose_name='Последняя цена')),
+                ('last_amount', models.PositiveIntegerField(verbose_name='Последний остаток')),
+                ('offer', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='price_history', to='store.offer', verbose_name='Предложение')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.product', verbose_name='Товар')),
+            ],
+            options={
+                'verbose_name': 'История цены предложения',
+                'verbose_name_plural': 'История цен предложений',
+                'db_table': 'OfferPriceHistory',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='productpricedaily',
+            constraint=models.UniqueConstraint(fields=('product', 'day'), name='product_price_daily_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='offerpricehistory',
+            constraint=models.UniqueConstraint(fields=('offer', 'month'), name='offer_price_history_unique'),
+        ),
+        migrations.RunPython(fill_price_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.6 on 2026-10-17 12:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('store', '0036_price_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ViewedProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('viewed_at', models.DateTimeField(verbose_name='Просмотрен')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.product', verbose_name='Товар')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='viewed_products', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Просмотренный товар',
+                'verbose_name_plural': 'Просмотренные товары',
+                'db_table': 'ViewedProducts',
+                'indexes': [models.Index(fields=['user', '-viewed_at'], name='viewed_products_user_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='viewedproduct',
+            constraint=models.UniqueConstraint(fields=('user', 'product'), name='viewed_products_unique'),
+        ),
+    ]
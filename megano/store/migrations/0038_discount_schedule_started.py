@@ -0,0 +1,28 @@
+# Generated by Django 4.2.6 on 2026-10-17 13:00
+
+from django.db import migrations, models
+from django.db.models import Q
+from django.utils import timezone
+
+
+def fill_schedule_started(apps, schema_editor):
+    Discount = apps.get_model('store', 'Discount')
+    Discount.objects.filter(Q(valid_from__isnull=True) | Q(valid_from__lte=timezone.now())).update(
+        schedule_started=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0037_viewed_products'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='discount',
+            name='schedule_started',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Начало действия обработано'),
+        ),
+        migrations.RunPython(fill_schedule_started, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.6 on 2026-10-17 13:03
+
+from django.db import migrations, models
+from django.db.models import F, Max, Min, OuterRef, Subquery
+
+
+def fill_last_prices(apps, schema_editor):
+    Offer = apps.get_model('store', 'Offer')
+    ProductPriceDaily = apps.get_model('store', 'ProductPriceDaily')
+
+    ProductPriceDaily.objects.update(last_min_price=F('min_price'), last_max_price=F('max_price'))
+
+    latest_day = ProductPriceDaily.objects.filter(product_id=OuterRef('product_id')).order_by('-day').values('day')[:1]
+    offers = Offer.objects.filter(product_id=OuterRef('product_id')).order_by().values('product_id')
+    ProductPriceDaily.objects.filter(day=Subquery(latest_day)).update(
+        last_min_price=Subquery(offers.annotate(price=Min('unit_price')).values('price')),
+        last_max_price=Subquery(offers.annotate(price=Max('unit_price')).values('price')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0038_discount_schedule_started'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productpricedaily',
+            name='last_max_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='Максимальная цена на конец дня'),
+        ),
+        migrations.AddField(
+            model_name='productpricedaily',
+            name='last_min_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='Минимальная цена на конец дня'),
+        ),
+        migrations.RunPython(fill_last_prices, migrations.RunPython.noop),
+    ]
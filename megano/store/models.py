@@ -1,8 +1,9 @@
 
-from decimal import Decimal
-from django.db.models import Avg, F
+from django.db.models import Avg
 
 from django.contrib.contenttypes.fields import GenericRelation
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from imagekit.models import ProcessedImageField
 from imagekit.processors import ResizeToFit
 
@@ -47,14 +48,12 @@ class Category(MPTTModel):
         return reverse('product-by-category', args=[str(self.slug)])
 
     def get_min_price(self):
-        # Функция вычисления минимальной цены в категории, нужна для главной страницы
+        # Функция возвращает минимальную цену в категории и ее подкатегориях, нужна для главной страницы и меню.
+        # Цена берется из предрассчитанной таблицы CategoryPriceStats без обращения к предложениям
 
-        # TODO закешировать, обновлять раз в день или при создании продукта
-        offers = Offer.objects.filter(product__category=self)
-        if hasattr(offers, '__iter__'):
-            return min((offer.unit_price for offer in offers))
+        price_stats = getattr(self, 'price_stats', None)
 
-        return offers.unit_price
+        return price_stats.min_price if price_stats else None
 
     def delete(self, *arg, **kwargs):
         """"
@@ -88,6 +87,9 @@ class Product(models.Model):
         related_name='products',
         verbose_name=_('Категория')
     )
+    category_tree_id = models.PositiveIntegerField(verbose_name=_('Дерево категории'), null=True, editable=False)
+    category_lft = models.PositiveIntegerField(verbose_name=_('Положение категории в дереве'), null=True,
+                                               editable=False)
     description = models.JSONField(
         _('Описание'),
         default=jsonfield_default_description,
@@ -101,15 +103,17 @@ class Product(models.Model):
         verbose_name=_('Основное фото'),
         upload_to="products/product/%y/%m/%d/",
         options={"quality": 80},
-        processors=[ResizeToFit(250, 226, mat_color='white')],
+        processors=[ResizeToFit(500, 452, mat_color='white')],
         blank=True,
         null=True
     )
+    preview_variants = models.JSONField(_('Копии основного фото'), default=dict, blank=True, editable=False)
     availability = models.BooleanField(verbose_name=_('Доступность'), default=False)
     created_at = models.DateTimeField(verbose_name=_('Создан'), auto_now_add=True)
     update_at = models.DateTimeField(verbose_name=_('Отредактирован'), auto_now=True)
     discount = models.ManyToManyField('Discount', related_name='products', verbose_name=_('Скидка'))
     limited_edition = models.BooleanField(verbose_name=_('Ограниченный тираж'), default=False)
+    search_vector = SearchVectorField(verbose_name=_('Поисковый вектор'), null=True, editable=False)
 
     def __str__(self) -> str:
         return f"{self.name} (id:{self.pk})"
@@ -119,9 +123,13 @@ class Product(models.Model):
 
     def get_average_price(self) -> float:
         """
-        Функция возвращает среднюю цену товара по всем продавцам
+        Функция возвращает среднюю цену товара по всем продавцам.
+        Если цены страницы загружены ProductPriceService.attach, запрос не выполняется.
         """
 
+        if hasattr(self, 'prices'):
+            return self.prices['average_price']
+
         if self.offers.all():
             return round(
                 Offer.objects.filter(
@@ -132,27 +140,20 @@ class Product(models.Model):
             )
 
     def get_discount_price(self):
-        discount_pr = self.discount.filter(name='DP', is_active=True).order_by('-sum_discount').first()
-        discount_cat = self.category.discount.filter(name='DP', is_active=True).order_by('-sum_discount').first()
-        if discount_pr:
-            if 1 <= discount_pr.sum_discount <= 99:
-                return round(
-                    Offer.objects.filter(
-                        product=self).annotate(
-                        d_price=F('unit_price') - F('unit_price') * Decimal(discount_pr.sum_discount / 100)).aggregate(
-                        Avg('d_price')
-                    ).get('d_price__avg')
-                )
-        elif discount_cat:
-            if 1 <= discount_cat.sum_discount <= 99:
-                return round(
-                    Offer.objects.filter(
-                        product=self).annotate(
-                        d_price=F('unit_price') - F('unit_price') * Decimal(discount_cat.sum_discount / 100)).aggregate(
-                        Avg('d_price')
-                    ).get('d_price__avg')
-                )
-        return None
+        """
+        Функция возвращает среднюю цену товара со скидкой на товар или его категорию.
+        Цены со скидкой берутся из таблицы EffectivePrice.
+        Если цены страницы загружены ProductPriceService.attach, запрос не выполняется.
+        """
+
+        if hasattr(self, 'prices'):
+            return self.prices['discount_price']
+
+        discount_price = self.effective_prices.filter(discount__isnull=False).aggregate(
+            Avg('final_price')
+        ).get('final_price__avg')
+
+        return round(discount_price) if discount_price is not None else None
 
     def delete(self, *arg, **kwargs):
         """"
@@ -166,6 +167,10 @@ class Product(models.Model):
     class Meta:
         db_table = 'Products'
         ordering = ['id', 'name']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='products_search_vector_gin'),
+            models.Index(fields=['category_tree_id', 'category_lft'], name='products_category_tree_idx'),
+        ]
         verbose_name = _('Товар')
         verbose_name_plural = _('Товары')
 
@@ -180,8 +185,9 @@ class ProductImage(models.Model):
         verbose_name=_('Фотография товара'),
         upload_to=product_images_directory_path,
         options={"quality": 80},
-        processors=[ResizeToFit(250, 226, mat_color='white')],
+        processors=[ResizeToFit(500, 452, mat_color='white')],
     )
+    image_variants = models.JSONField(_('Копии фотографии'), default=dict, blank=True, editable=False)
 
     def __str__(self) -> str:
         return f"{self.pk}"
@@ -219,20 +225,15 @@ class Offer(models.Model):
         return f"{self.offer_from} {self.seller.name_store}"
 
     def get_discount_price(self):
-        discount_pr = self.product.discount.filter(name='DP', is_active=True).order_by('-sum_discount').first()
-        discount_cat = (self.product.category.discount.filter(name='DP', is_active=True)
-                        .order_by('-sum_discount').first())
-        if discount_pr:
-            if 1 <= discount_pr.sum_discount <= 99:
-                return round(
-                    self.unit_price - self.unit_price * Decimal(discount_pr.sum_discount / 100)
-                )
-        elif discount_cat:
-            if 1 <= discount_cat.sum_discount <= 99:
-                return round(
-                    self.unit_price - self.unit_price * Decimal(discount_cat.sum_discount / 100)
-                )
-        return None
+        """
+        Функция возвращает цену предложения с лучшей действующей скидкой на товар или его категорию
+        """
+
+        effective_price = getattr(self, 'effective_price', None)
+        if effective_price is None or effective_price.discount_id is None:
+            return None
+
+        return round(effective_price.final_price)
 
     class Meta:
         db_table = 'Offer'
@@ -241,12 +242,297 @@ class Offer(models.Model):
         verbose_name_plural = _('Предложения')
 
 
+class OfferIndex(models.Model):
+    """
+    Модель денормализованных данных предложения для фильтрации каталога по цене, продавцу и доставке
+    """
+
+    offer = models.OneToOneField(
+        'store.Offer',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_index',
+        verbose_name=_('Предложение')
+    )
+    product = models.ForeignKey(
+        'store.Product',
+        on_delete=models.CASCADE,
+        related_name='offer_index',
+        verbose_name=_('Товар')
+    )
+    seller = models.ForeignKey(
+        'authorization.Profile',
+        on_delete=models.CASCADE,
+        related_name='offer_index',
+        verbose_name=_('Продавец')
+    )
+    unit_price = models.DecimalField(_('Цена'), max_digits=8, decimal_places=2)
+    amount = models.PositiveIntegerField(_('Количество'))
+    delivery_type = models.IntegerField(_('Способ доставки'), null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.offer_id}"
+
+    class Meta:
+        db_table = 'OfferIndex'
+        indexes = [
+            models.Index(fields=['product', 'seller', 'delivery_type', 'unit_price'], name='offer_index_product_idx'),
+            models.Index(fields=['seller', 'product'], name='offer_index_seller_idx'),
+        ]
+        verbose_name = _('Индекс предложения')
+        verbose_name_plural = _('Индекс предложений')
+
+
+class EffectivePrice(models.Model):
+    """
+    Модель предрассчитанной цены предложения с учетом лучшей действующей скидки на товар (DP)
+    """
+
+    offer = models.OneToOneField(
+        'store.Offer',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='effective_price',
+        verbose_name=_('Предложение')
+    )
+    product = models.ForeignKey(
+        'store.Product',
+        on_delete=models.CASCADE,
+        related_name='effective_prices',
+        verbose_name=_('Товар')
+    )
+    base_price = models.DecimalField(_('Цена'), max_digits=8, decimal_places=2)
+    discount = models.ForeignKey(
+        'store.Discount',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_('Скидка')
+    )
+    sum_discount = models.FloatField(_('Сумма скидки'), null=True, blank=True)
+    final_price = models.DecimalField(_('Цена со скидкой'), max_digits=8, decimal_places=2)
+    updated_at = models.DateTimeField(_('Обновлено'), auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.offer_id}"
+
+    class Meta:
+        db_table = 'EffectivePrices'
+        indexes = [
+            models.Index(fields=['product', 'final_price'], name='effective_price_product_idx'),
+        ]
+        verbose_name = _('Цена со скидкой')
+        verbose_name_plural = _('Цены со скидкой')
+
+
+class OfferPriceHistory(models.Model):
+    """
+    Модель истории цены и остатка предложения за месяц.
+    Хранится начальное значение месяца и список изменений в виде разностей:
+    [секунды от начала записи, изменение цены в копейках, изменение остатка].
+    """
+
+    offer = models.ForeignKey(
+        'store.Offer',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='price_history',
+        verbose_name=_('Предложение')
+    )
+    product = models.ForeignKey(
+        'store.Product',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('Товар')
+    )
+    month = models.DateField(_('Месяц'))
+    started_at = models.DateTimeField(_('Начало записи'))
+    start_price = models.DecimalField(_('Начальная цена'), max_digits=8, decimal_places=2)
+    start_amount = models.PositiveIntegerField(_('Начальный остаток'))
+    points = models.JSONField(_('Изменения'), default=list)
+    last_price = models.DecimalField(_('Последняя цена'), max_digits=8, decimal_places=2)
+    last_amount = models.PositiveIntegerField(_('Последний остаток'))
+
+    def __str__(self) -> str:
+        return f"{self.offer_id} {self.month:%m.%Y}"
+
+    class Meta:
+        db_table = 'OfferPriceHistory'
+        constraints = [
+            models.UniqueConstraint(fields=['offer', 'month'], name='offer_price_history_unique'),
+        ]
+        verbose_name = _('История цены предложения')
+        verbose_name_plural = _('История цен предложений')
+
+
+class ProductPriceDaily(models.Model):
+    """
+    Модель дневных агрегатов цены и остатка товара для графика истории цены
+    """
+
+    product = models.ForeignKey(
+        'store.Product',
+        on_delete=models.CASCADE,
+        related_name='price_daily',
+        verbose_name=_('Товар')
+    )
+    day = models.DateField(_('День'))
+    min_price = models.DecimalField(_('Минимальная цена'), max_digits=8, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(_('Максимальная цена'), max_digits=8, decimal_places=2, null=True, blank=True)
+    avg_price = models.DecimalField(_('Средняя цена'), max_digits=8, decimal_places=2, null=True, blank=True)
+    last_min_price = models.DecimalField(
+        _('Минимальная цена на конец дня'), max_digits=8, decimal_places=2, null=True, blank=True,
+    )
+    last_max_price = models.DecimalField(
+        _('Максимальная цена на конец дня'), max_digits=8, decimal_places=2, null=True, blank=True,
+    )
+    amount = models.PositiveIntegerField(_('Остаток на складах'), default=0)
+
+    def __str__(self) -> str:
+        return f"{self.product_id} {self.day:%d.%m.%Y}"
+
+    class Meta:
+        db_table = 'ProductPriceDaily'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'day'], name='product_price_daily_unique'),
+        ]
+        verbose_name = _('Цена товара за день')
+        verbose_name_plural = _('Цены товаров по дням')
+
+
+class CategoryPriceStats(models.Model):
+    """
+    Модель предрассчитанных минимальной и максимальной цены товаров категории вместе с подкатегориями
+    """
+
+    category = models.OneToOneField(
+        'store.Category',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='price_stats',
+        verbose_name=_('Категория')
+    )
+    min_price = models.DecimalField(_('Минимальная цена'), max_digits=8, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(_('Максимальная цена'), max_digits=8, decimal_places=2, null=True, blank=True)
+    updated_at = models.DateTimeField(_('Обновлено'), auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.category_id}"
+
+    class Meta:
+        db_table = 'CategoryPriceStats'
+        verbose_name = _('Цены категории')
+        verbose_name_plural = _('Цены категорий')
+
+
+class ProductStats(models.Model):
+    """
+    Модель предрассчитанных агрегатов товара для сортировки и фильтрации каталога
+    """
+
+    product = models.OneToOneField(
+        'store.Product',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name=_('Товар')
+    )
+    min_price = models.DecimalField(_('Минимальная цена'), max_digits=8, decimal_places=2, null=True, blank=True)
+    avg_price = models.DecimalField(_('Средняя цена'), max_digits=8, decimal_places=2, null=True, blank=True,
+                                    db_index=True)
+    max_price = models.DecimalField(_('Максимальная цена'), max_digits=8, decimal_places=2, null=True, blank=True)
+    paid_orders = models.PositiveIntegerField(_('Оплаченные заказы'), default=0, db_index=True)
+    reviews_count = models.PositiveIntegerField(_('Количество отзывов'), default=0, db_index=True)
+    total_amount = models.PositiveIntegerField(_('Остаток на складах'), default=0)
+    updated_at = models.DateTimeField(_('Обновлено'), auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.product_id}"
+
+    class Meta:
+        db_table = 'ProductStats'
+        verbose_name = _('Статистика товара')
+        verbose_name_plural = _('Статистика товаров')
+
+
+class RelatedProduct(models.Model):
+    """
+    Модель рекомендаций "С этим товаром покупают": товары, которые чаще всего встречаются в оплаченных заказах
+    вместе с товаром. Для каждого товара хранится ограниченное количество лучших рекомендаций.
+    """
+
+    product = models.ForeignKey(
+        'store.Product',
+        on_delete=models.CASCADE,
+        related_name='related_products',
+        verbose_name=_('Товар')
+    )
+    related = models.ForeignKey(
+        'store.Product',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('Рекомендуемый товар')
+    )
+    score = models.PositiveIntegerField(_('Совместные заказы'))
+
+    def __str__(self) -> str:
+        return f"{self.product_id} - {self.related_id}"
+
+    class Meta:
+        db_table = 'RelatedProducts'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'related'], name='related_products_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['product', '-score'], name='related_products_score_idx'),
+        ]
+        verbose_name = _('Рекомендуемый товар')
+        verbose_name_plural = _('Рекомендуемые товары')
+
+
+class ViewedProduct(models.Model):
+    """
+    Модель просмотренных товаров пользователя. Для пользователя хранится ограниченное количество
+    последних просмотров.
+    """
+
+    user = models.ForeignKey(
+        'auth.User',
+        on_delete=models.CASCADE,
+        related_name='viewed_products',
+        verbose_name=_('Пользователь')
+    )
+    product = models.ForeignKey(
+        'store.Product',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('Товар')
+    )
+    viewed_at = models.DateTimeField(_('Просмотрен'))
+
+    def __str__(self) -> str:
+        return f"{self.user_id} - {self.product_id}"
+
+    class Meta:
+        db_table = 'ViewedProducts'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product'], name='viewed_products_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-viewed_at'], name='viewed_products_user_idx'),
+        ]
+        verbose_name = _('Просмотренный товар')
+        verbose_name_plural = _('Просмотренные товары')
+
+
 class Tag(models.Model):
     """
     Модель тегов
     """
 
     name = models.CharField(_('Название'), default='', max_length=50, null=False, blank=False)
+    paid_orders = models.PositiveIntegerField(_('Оплаченные заказы'), default=0, db_index=True, editable=False)
 
     def __str__(self) -> str:
         return f"{self.name}"
@@ -297,6 +583,9 @@ class Reviews(models.Model):
 
     class Meta:
         db_table = 'Reviews'
+        indexes = [
+            models.Index(fields=['product', '-created_at', '-id'], name='reviews_product_created_idx'),
+        ]
         verbose_name = _('Отзыв')
         verbose_name_plural = _('Отзывы')
 
@@ -330,6 +619,7 @@ class Discount(models.Model):
     valid_from = models.DateTimeField(_('Действует с'), null=True, blank=True)
     valid_to = models.DateTimeField(_('Действует до'), null=True, blank=True)
     is_active = models.BooleanField(_('Активно'), default=False)
+    schedule_started = models.BooleanField(_('Начало действия обработано'), default=False, editable=False)
     created_at = models.DateTimeField(_('Создана'), auto_now_add=True)
 
     def __str__(self) -> str:
@@ -1,8 +1,31 @@
+from django.contrib.auth.signals import user_logged_in
 from django.core.cache import cache
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models import Subquery
+from django.db.models.signals import pre_save, pre_delete, post_save, post_delete, m2m_changed
+from django.utils import timezone
+from mptt.signals import node_moved
 
-from .models import Banners, Category, Product
+from authorization.models import Profile, StoreSettings
+from compare.models import AbstractCharacteristicModel
+from compare.registry import registry
+from services.best_offer import BestOfferService
+from services.catalog_cache import CatalogCache
+from services.category_prices import CategoryPriceService
+from services.category_tree import CategoryTreeService
+from services.discount_engine import DiscountEngine
+from services.effective_price import EffectivePriceService
+from services.object_cache import ObjectCache
+from services.offer_index import OfferIndexService
+from services.popular_tags import PopularTagsService
+from services.price_history import PriceHistoryService
+from services.product_detail import ProductDetailCache
+from services.product_search import ProductSearchService
+from services.product_stats import ProductStatsService
+from services.recently_viewed import RecentlyViewedService
+from .models import Banners, Category, Discount, Product, ProductImage, Offer, Orders, Reviews, Tag
+from .tasks import generate_image_variants, generate_preview_variants
 
 
 @receiver(post_save, sender=Banners)
@@ -17,6 +40,15 @@ def cache_deleted_banners(**kwargs) -> None:
         pass
 
 
+@receiver(user_logged_in)
+def merge_recently_viewed(sender, request, user, **kwargs) -> None:
+    """
+    Перенос просмотренных до входа товаров в список просмотров пользователя
+    """
+
+    RecentlyViewedService.merge_session_to_user(request, user)
+
+
 @receiver(post_save, sender=Category)
 def cache_deleted_category(**kwargs) -> None:
     """
@@ -29,6 +61,46 @@ def cache_deleted_category(**kwargs) -> None:
         pass
 
 
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(node_moved, sender=Category)
+def sync_category_tree(sender, instance, created: bool = False, **kwargs) -> None:
+    """
+    Сброс кэша поддеревьев категорий и обновление положения категории у товаров при изменении дерева.
+    Цены категорий полностью пересчитываются, только если положение категории изменилось хотя бы у одного
+    товара, поэтому переименование категории без перемещения не пересчитывает цены
+    """
+
+    CategoryTreeService.invalidate()
+    if CategoryTreeService.sync_products():
+        CatalogCache.invalidate()
+        CategoryPriceService().rebuild()
+    elif created:
+        CategoryPriceService().refresh_categories([instance.pk])
+
+
+@receiver(pre_save, sender=Product)
+def set_product_category_tree(sender, instance, **kwargs) -> None:
+    """
+    Сохранение положения категории товара в дереве для отбора товаров поддерева
+    и прежней категории товара для пересчета цен категорий при переносе товара.
+    Оба значения загружаются одним запросом.
+    """
+
+    previous_category = Product.objects.filter(pk=instance.pk).values('category_id')
+
+    if instance.category_id:
+        category = Category.objects.annotate(
+            previous_category_id=Subquery(previous_category),
+        ).values('tree_id', 'lft', 'previous_category_id').get(pk=instance.category_id)
+        instance.category_tree_id, instance.category_lft = category['tree_id'], category['lft']
+        instance.previous_category_id = category['previous_category_id']
+    else:
+        instance.previous_category_id = (
+            previous_category.values_list('category_id', flat=True).first() if instance.pk else None
+        )
+
+
 @receiver(post_save, sender=Product)
 def reset_product_list_cache(sender, instance, **kwargs):
     cache_key = 'product_list_cache'
@@ -36,15 +108,395 @@ def reset_product_list_cache(sender, instance, **kwargs):
 
 
 @receiver(post_save, sender=Product)
-def cache_deleted_product(**kwargs) -> None:
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_object_cache(sender, instance, **kwargs) -> None:
     """
-    Удаление кэша товара и списка товаров при изменении, добавлении модели
+    Сброс кэша объекта при изменении товара или профиля
     """
 
-    try:
-        slug = kwargs['instance'].slug
-        cache.delete(f'product-{slug}')
-        cache.delete('products')
+    ObjectCache.invalidate_object(sender, instance.pk)
 
-    except AttributeError:
-        pass
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def cache_deleted_product(sender, instance, **kwargs) -> None:
+    """
+    Сброс кэша страницы товара при изменении модели
+    """
+
+    ProductDetailCache.invalidate([instance.pk])
+
+
+@receiver(post_save, sender=Product)
+def create_preview_variants(sender, instance, **kwargs) -> None:
+    """
+    Создание копий основного фото товара в фоне после загрузки или импорта
+    """
+
+    if instance.preview and instance.preview_variants.get('source') != instance.preview.name:
+        transaction.on_commit(
+            lambda: generate_preview_variants.apply_async(kwargs={'product_id': instance.pk}, queue='images')
+        )
+
+
+@receiver(post_save, sender=ProductImage)
+def create_image_variants(sender, instance, **kwargs) -> None:
+    """
+    Создание копий фотографии товара в фоне после загрузки или импорта
+    """
+
+    if instance.image and instance.image_variants.get('source') != instance.image.name:
+        transaction.on_commit(
+            lambda: generate_image_variants.apply_async(kwargs={'image_id': instance.pk}, queue='images')
+        )
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+@receiver(post_save, sender=Reviews)
+@receiver(post_delete, sender=Reviews)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def invalidate_product_detail(sender, instance, **kwargs) -> None:
+    """
+    Сброс кэша страницы товара при изменении его предложений, отзывов и изображений
+    """
+
+    ProductDetailCache.invalidate([instance.product_id])
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+def invalidate_product_detail_tags(sender, instance, action, reverse, pk_set, **kwargs) -> None:
+    """
+    Сброс кэша страниц товаров при изменении их тегов
+    """
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if reverse:
+        ProductDetailCache.invalidate_all()
+    else:
+        ProductDetailCache.invalidate([instance.pk])
+
+
+@receiver(post_save, sender=StoreSettings)
+def invalidate_seller_product_detail(sender, instance, **kwargs) -> None:
+    """
+    Сброс кэша страниц товаров продавца при изменении способов доставки и оплаты
+    """
+
+    product_ids = Offer.objects.filter(seller_id=instance.profile_id).values_list('product_id', flat=True)
+    ProductDetailCache.invalidate(product_ids)
+
+
+@receiver(post_save, sender=Discount)
+@receiver(post_delete, sender=Discount)
+@receiver(m2m_changed, sender=Product.discount.through)
+@receiver(m2m_changed, sender=Category.discount.through)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_all_product_detail(**kwargs) -> None:
+    """
+    Сброс кэша всех страниц товаров при изменении скидок, тегов и категорий
+    """
+
+    ProductDetailCache.invalidate_all()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_popular_tags(**kwargs) -> None:
+    """
+    Сброс кэша популярных тегов при переименовании и удалении тега
+    """
+
+    PopularTagsService().clear_cache()
+
+
+@receiver(post_save, sender=Discount)
+@receiver(post_delete, sender=Discount)
+@receiver(m2m_changed, sender=Product.discount.through)
+@receiver(m2m_changed, sender=Category.discount.through)
+def invalidate_discount_snapshot(**kwargs) -> None:
+    """
+    Сброс снимка скидок корзины при изменении скидок
+    """
+
+    DiscountEngine.invalidate()
+
+
+@receiver(post_save, sender=Discount)
+def refresh_discount_effective_prices(sender, instance, **kwargs) -> None:
+    """
+    Пересчет цен со скидкой товаров скидки при ее изменении, включении и выключении
+    """
+
+    EffectivePriceService().refresh_discount(instance)
+
+
+@receiver(pre_save, sender=Discount)
+def reset_discount_schedule(sender, instance, update_fields=None, **kwargs) -> None:
+    """
+    Сброс отметки начала действия скидки при создании скидки и изменении даты начала:
+    планировщик включит скидку, только если дата начала еще не наступила
+    """
+
+    if update_fields is not None and 'valid_from' not in update_fields:
+        return
+
+    if instance.pk is None or Discount.objects.filter(pk=instance.pk).exclude(valid_from=instance.valid_from).exists():
+        instance.schedule_started = instance.valid_from is None or instance.valid_from <= timezone.now()
+
+
+@receiver(pre_delete, sender=Discount)
+def collect_discount_effective_prices(sender, instance, **kwargs) -> None:
+    """
+    Сохранение товаров удаляемой скидки: после удаления связи скидки с товарами уже удалены
+    """
+
+    instance.effective_price_product_ids = EffectivePriceService.get_discount_product_ids(instance.pk)
+
+
+@receiver(post_delete, sender=Discount)
+def refresh_deleted_discount_effective_prices(sender, instance, **kwargs) -> None:
+    """
+    Пересчет цен со скидкой товаров удаленной скидки
+    """
+
+    EffectivePriceService().refresh(getattr(instance, 'effective_price_product_ids', ()))
+
+
+@receiver(m2m_changed, sender=Product.discount.through)
+@receiver(m2m_changed, sender=Category.discount.through)
+def refresh_m2m_effective_prices(sender, instance, action, reverse, pk_set, **kwargs) -> None:
+    """
+    Пересчет цен со скидкой при изменении товаров и категорий скидки
+    """
+
+    if action == 'pre_clear' and reverse:
+        instance.effective_price_product_ids = EffectivePriceService.get_discount_product_ids(instance.pk)
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if reverse and action == 'post_clear':
+        product_ids = getattr(instance, 'effective_price_product_ids', ())
+    elif reverse and sender is Product.discount.through:
+        product_ids = pk_set
+    elif reverse:
+        product_ids = Product.objects.filter(category_id__in=pk_set).values_list('id', flat=True)
+    elif sender is Product.discount.through:
+        product_ids = [instance.pk]
+    else:
+        product_ids = instance.products.values_list('id', flat=True)
+
+    EffectivePriceService().refresh(product_ids)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Offer)
+def refresh_product_effective_prices(sender, instance, **kwargs) -> None:
+    """
+    Пересчет цен со скидкой при изменении цены предложения или категории товара
+    """
+
+    EffectivePriceService().refresh([instance.pk if sender is Product else instance.product_id])
+
+
+@receiver(post_save, sender=Product)
+def create_product_stats(sender, instance, created, **kwargs) -> None:
+    """
+    Создание строки агрегатов для нового товара
+    """
+
+    if created:
+        ProductStatsService().refresh([instance.pk])
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+@receiver(post_save, sender=Reviews)
+@receiver(post_delete, sender=Reviews)
+def refresh_product_stats(sender, instance, signal, **kwargs) -> None:
+    """
+    Пересчет агрегатов товара при изменении предложений и отзывов.
+    После удаления пересчет откладывается до фиксации транзакции: при каскадном удалении товара
+    предложения и отзывы удаляются раньше товара, и строка агрегатов не должна создаваться заново
+    """
+
+    if signal is post_delete:
+        transaction.on_commit(lambda: ProductStatsService().refresh([instance.product_id]))
+    else:
+        ProductStatsService().refresh([instance.product_id])
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+def refresh_offer_category_prices(sender, instance, **kwargs) -> None:
+    """
+    Пересчет цен категории товара и ее предков после пересчета агрегатов товара
+    """
+
+    CategoryPriceService().refresh_products([instance.product_id])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def refresh_product_category_prices(sender, instance, signal, **kwargs) -> None:
+    """
+    Пересчет цен прежней и новой категории при переносе или удалении товара
+    """
+
+    previous_category_id = getattr(instance, 'previous_category_id', None)
+    if signal is post_save and previous_category_id in (None, instance.category_id):
+        return
+
+    CategoryPriceService().refresh_categories({previous_category_id, instance.category_id} - {None})
+
+
+@receiver(post_save, sender=Orders)
+def refresh_order_products_stats(sender, instance, **kwargs) -> None:
+    """
+    Пересчет количества оплаченных заказов при изменении статуса заказа
+    """
+
+    ProductStatsService().refresh(instance.products.values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=Orders.products.through)
+def refresh_order_products_changed_stats(sender, instance, action, reverse, pk_set, **kwargs) -> None:
+    """
+    Пересчет количества оплаченных заказов при изменении состава заказа
+    """
+
+    if action == 'pre_clear' and not reverse:
+        instance.stats_product_ids = list(instance.products.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if reverse:
+        ProductStatsService().refresh([instance.pk])
+    elif action == 'post_clear':
+        ProductStatsService().refresh(getattr(instance, 'stats_product_ids', ()))
+    else:
+        ProductStatsService().refresh(pk_set)
+
+
+@receiver(post_save, sender=Offer)
+def refresh_offer_index(sender, instance, **kwargs) -> None:
+    """
+    Обновление строки индекса предложений при изменении предложения
+    """
+
+    OfferIndexService().refresh([instance.pk])
+
+
+@receiver(post_save, sender=Offer)
+def update_best_offer(sender, instance, **kwargs) -> None:
+    """
+    Обновление предложения в списке лучших предложений товара при изменении цены или остатка
+    """
+
+    BestOfferService().update(instance)
+
+
+@receiver(post_delete, sender=Offer)
+def remove_best_offer(sender, instance, **kwargs) -> None:
+    """
+    Удаление предложения из списка лучших предложений товара
+    """
+
+    BestOfferService().remove(instance)
+
+
+@receiver(post_save, sender=Offer)
+def record_offer_price_history(sender, instance, **kwargs) -> None:
+    """
+    Запись изменения цены и остатка предложения в историю
+    """
+
+    PriceHistoryService().record(instance)
+
+
+@receiver(post_delete, sender=Offer)
+def record_deleted_offer_price_history(sender, instance, **kwargs) -> None:
+    """
+    Обновление дневного агрегата цены товара после удаления предложения
+    """
+
+    transaction.on_commit(lambda: PriceHistoryService().record_product_day(instance.product_id))
+
+
+@receiver(post_save, sender=StoreSettings)
+@receiver(post_delete, sender=StoreSettings)
+def refresh_seller_offer_index(sender, instance, signal, **kwargs) -> None:
+    """
+    Обновление способа доставки в индексе предложений при изменении настроек магазина
+    """
+
+    delivery_type = instance.delivery_type if signal is post_save else None
+    OfferIndexService().refresh_seller(instance.profile_id, delivery_type)
+    CatalogCache.invalidate()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+@receiver(post_save, sender=Discount)
+@receiver(post_delete, sender=Discount)
+@receiver(m2m_changed, sender=Product.discount.through)
+@receiver(m2m_changed, sender=Category.discount.through)
+@receiver(post_save, sender=Reviews)
+@receiver(post_delete, sender=Reviews)
+@receiver(post_save, sender=Orders)
+@receiver(post_delete, sender=Orders)
+@receiver(m2m_changed, sender=Orders.products.through)
+def invalidate_catalog_cache(**kwargs) -> None:
+    """
+    Сброс кэша каталога при изменении товаров, предложений, скидок,
+    а также отзывов и заказов, от которых зависят сортировки по рейтингу и популярности
+    """
+
+    CatalogCache.invalidate()
+
+
+@receiver(post_save, sender=Product)
+def update_product_search_vector(sender, instance, **kwargs) -> None:
+    """
+    Обновление поискового вектора товара при изменении модели
+    """
+
+    ProductSearchService().update([instance.pk])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_characteristics(sender, instance, **kwargs) -> None:
+    """
+    Сброс кэша характеристик товара: при смене категории меняется модель характеристик
+    """
+
+    registry.invalidate([instance.pk])
+
+
+def update_feature_search_vector(sender, instance, **kwargs) -> None:
+    """
+    Обновление поискового вектора и сброс кэша страницы товара и его характеристик при изменении характеристик
+    """
+
+    if instance.content_type.model_class() is Product:
+        ProductSearchService().update([instance.object_id])
+        registry.invalidate([instance.object_id])
+        ProductDetailCache.invalidate([instance.object_id])
+
+
+for characteristic_model in AbstractCharacteristicModel.__subclasses__():
+    post_save.connect(update_feature_search_vector, sender=characteristic_model)
+    post_delete.connect(update_feature_search_vector, sender=characteristic_model)
@@ -4,6 +4,10 @@ from celery.exceptions import Ignore
 from django.core.mail import send_mail
 
 from megano.celery import app
+from services.effective_price import EffectivePriceService
+from services.image_variants import ImageVariantService
+from services.popular_tags import PopularTagsService
+from services.related_products import RelatedProductsService
 from services.services import PaymentService, ImportProductService
 
 
@@ -79,3 +83,48 @@ def import_product_from_command(self, file_data: list, name: str, email: str, fi
         self.update_state(state='FAILURE')
 
         raise Ignore()
+
+
+@app.task
+def recompute_popular_tags():
+    """
+    Таск на полный пересчет рейтинга популярных тегов
+    """
+
+    PopularTagsService().recompute()
+
+
+@app.task
+def rebuild_related_products():
+    """
+    Таск на полный пересчет рекомендаций "С этим товаром покупают"
+    """
+
+    RelatedProductsService().rebuild()
+
+
+@app.task
+def apply_discount_schedule():
+    """
+    Таск на включение и выключение скидок по датам начала и окончания
+    """
+
+    EffectivePriceService().apply_schedule()
+
+
+@app.task
+def generate_preview_variants(product_id: int):
+    """
+    Таск на создание копий основного фото товара
+    """
+
+    ImageVariantService().refresh_product(product_id)
+
+
+@app.task
+def generate_image_variants(image_id: int):
+    """
+    Таск на создание копий фотографии товара
+    """
+
+    ImageVariantService().refresh_image(image_id)
@@ -0,0 +1,12 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter()
+def facet_count(facet: dict, key) -> int:
+    """
+    Фильтр, возвращающий количество товаров для значения фасета
+    """
+
+    return (facet or {}).get(str(key), 0)
@@ -0,0 +1,36 @@
+from django import template
+from django.db.models.fields.files import FieldFile
+from django.utils.html import format_html
+
+from services.image_variants import ImageVariantService
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(field_file: FieldFile, variants: dict, width: int, alt: str = '', css_class: str = '') -> str:
+    """
+    Тег выводит изображение товара с копиями в WebP и JPEG через srcset.
+    Браузер выбирает формат и размер копии под ширину width и плотность экрана.
+    Пока копии не созданы, выводится исходный файл.
+
+    Пример: {% responsive_image product.preview product.preview_variants 250 %}
+    """
+
+    variants = variants or {}
+    webp_srcset = ImageVariantService.get_srcset(field_file, variants, 'webp')
+    jpeg_srcset = ImageVariantService.get_srcset(field_file, variants, 'jpeg')
+    src = ImageVariantService.get_url(field_file, variants, width)
+    sizes = f'{width}px'
+    css = format_html(' class="{}"', css_class) if css_class else ''
+
+    if not webp_srcset:
+        return format_html('<img src="{}" alt="{}"{}/>', src, alt, css)
+
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}"/>'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}"{} loading="lazy"/>'
+        '</picture>',
+        webp_srcset, sizes, src, jpeg_srcset, sizes, alt, css,
+    )
@@ -1,7 +1,10 @@
 from django.urls import path
 
 from .views import (CatalogListView,
+                    CatalogApiView,
                     ProductDetailView,
+                    ProductReviewsView,
+                    ProductPriceHistoryView,
                     SettingsView,
                     ClearCacheAll,
                     ClearCacheBanner,
@@ -9,6 +12,7 @@ from .views import (CatalogListView,
                     ClearCacheProductDetail,
                     ClearCacheSeller,
                     ClearCacheCatalog,
+                    ClearQueryBudget,
                     SiteName,
                     CacheSetupBannerView,
                     CacheSetupCartView,
@@ -30,7 +34,11 @@ app_name = 'store'
 urlpatterns = [
     path('catalog/', CatalogListView.as_view(), name='catalog'),
     path('catalog/<slug:slug>/', CatalogListView.as_view(), name='category'),
+    path('api/catalog/', CatalogApiView.as_view(), name='catalog-api'),
+    path('api/catalog/<slug:slug>/', CatalogApiView.as_view(), name='category-api'),
     path('product/<slug:slug>/', ProductDetailView.as_view(), name='product-detail'),
+    path('product/<slug:slug>/reviews/', ProductReviewsView.as_view(), name='product-reviews'),
+    path('product/<slug:slug>/price-history/', ProductPriceHistoryView.as_view(), name='product-price-history'),
     path('', MainPage.as_view(), name='index'),
     path('order/<int:pk>/payment/', PaymentFormView.as_view(), name='payment-form'),
     path('order/<int:pk>/payment/progress/', PaymentProgressView.as_view(), name='payment-progress'),
@@ -43,6 +51,7 @@ urlpatterns = [
     path('clear-cart/', ClearCacheCart.as_view(), name='clear_cart_cache'),
     path('clear-seller/', ClearCacheSeller.as_view(), name='clear_seller'),
     path('clear-catalog/', ClearCacheCatalog.as_view(), name='clear_catalog'),
+    path('clear-query-budget/', ClearQueryBudget.as_view(), name='clear_query_budget'),
     path('clear-product-detail/', ClearCacheProductDetail.as_view(), name='clear_product_detail'),
     path('site-name/', SiteName.as_view(), name='site_name'),
     path('cache-time-banner/', CacheSetupBannerView.as_view(), name='cache_time_banner'),
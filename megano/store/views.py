@@ -2,8 +2,10 @@ from django.contrib.auth import authenticate, login
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
 from django.shortcuts import redirect, get_object_or_404
-from django.views.generic import ListView, DetailView, TemplateView, UpdateView, CreateView, FormView
-from django.http import HttpResponse, HttpResponseRedirect
+from django.views.generic import View, ListView, DetailView, TemplateView, UpdateView, CreateView, FormView
+from django.http import Http404, HttpResponse, HttpResponseRedirect, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
 from django.contrib import messages
@@ -28,10 +30,20 @@ from services.services import (ProductService,
                                CatalogService,
                                CategoryServices,
                                GetParamService,
-                               ProductsViewService,
                                ReviewsProduct,
                                MainService,
                                )
+from services.best_offer import BestOfferService
+from services.catalog_api import CatalogApiService
+from services.catalog_cache import CatalogCache, CachedProductList
+from services.facets import FacetService
+from services.object_cache import ObjectCache
+from services.price_history import PriceHistoryService
+from services.product_detail import ProductDetailCache
+from services.product_prices import ProductPriceService
+from services.query_budget import QueryBudgetService
+from services.recently_viewed import RecentlyViewedService
+from services.pagination import KeysetPaginator
 
 import logging
 import re
@@ -48,31 +60,78 @@ class CatalogListView(ListView):
     context_object_name = 'products'
     paginate_by = 8
 
-    def get_queryset(self) -> Product.objects:
+    def get_queryset(self):
         """
         Функция возвращает отфильтрованные продукты по категории, тегу, фильтру или сортировке.
-        Если переданные GET параметры совпадают с кэшированными, то продукты берутся из кэша.
+        Список id продуктов кэшируется по набору GET параметров, категории и языку.
+        В режиме пагинации по курсору возвращается queryset без кэширования и подсчета количества.
         """
 
-        queryset = super().get_queryset()
-        get_params_for_queryset = cache.get('get_params')
-        category = self.request.resolver_match.captured_kwargs.get('slug')
+        if self.is_keyset_pagination():
+            return self.filter_products().qs
 
-        if category:
-            queryset = CategoryServices.product_by_category(
-                self.request.resolver_match.captured_kwargs['slug']
-            )
+        self.catalog_cache = CatalogCache(self.request, self.kwargs.get('slug'))
+        self.cached = self.catalog_cache.get()
 
-        if self.request.GET and get_params_for_queryset == self.request.GET and not category:
-            self.filtered_and_sorted = cache.get('products')
+        if self.cached is None:
+            product_ids = list(dict.fromkeys(self.filter_products().qs.values_list('id', flat=True)))
+            self.cached = self.catalog_cache.set(product_ids)
         else:
-            product_filter = ProductFilter(self.request.GET, queryset=queryset)
-            self.filtered_and_sorted = CatalogService().catalog_processing(self.request, product_filter)
+            self.filtered_and_sorted = ProductFilter(self.request.GET, queryset=Product.objects.none())
+
+        return CachedProductList(self.cached['ids'], self.get_page_queryset())
+
+    def get_page_queryset(self) -> Product.objects:
+        """
+        Функция возвращает queryset, которым загружаются товары текущей страницы
+        """
+
+        return Product.objects.all()
+
+    def get_facets(self) -> dict:
+        """
+        Функция возвращает фасеты текущей выдачи.
+        Фасеты сохраняются в кэше каталога вместе со списком id товаров.
+        """
+
+        if self.is_keyset_pagination():
+            return FacetService(self.filtered_and_sorted.qs.order_by().values('id')).get_facets()
+
+        if 'facets' not in self.cached:
+            facets = FacetService(self.cached['ids']).get_facets()
+            self.cached = self.catalog_cache.set_facets(self.cached, facets)
+
+        return self.cached['facets']
+
+    def filter_products(self) -> ProductFilter:
+        """
+        Функция фильтрует и сортирует продукты по GET параметрам запроса
+        """
+
+        queryset = super().get_queryset()
+        category = self.kwargs.get('slug')
+        if category:
+            queryset = CategoryServices.product_by_category(category)
 
-            cache.set('get_params', self.request.GET, settings.get_cache_filter_params())
-            cache.set('products', self.filtered_and_sorted, settings.get_cache_catalog())
+        product_filter = ProductFilter(self.request.GET, queryset=queryset)
+        self.filtered_and_sorted = CatalogService().catalog_processing(self.request, product_filter)
 
-        return self.filtered_and_sorted.qs
+        return self.filtered_and_sorted
+
+    def is_keyset_pagination(self) -> bool:
+        """
+        Пагинация по курсору включается GET параметром cursor (пустое значение - первая страница)
+        """
+
+        return 'cursor' in self.request.GET
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.is_keyset_pagination():
+            return super().paginate_queryset(queryset, page_size)
+
+        page = KeysetPaginator(queryset, page_size).get_page(self.request.GET.get('cursor'))
+
+        return None, page, page.object_list, page.has_other_pages()
 
     def get_context_data(self, **kwargs) -> HttpResponse:
         """
@@ -81,13 +140,65 @@ class CatalogListView(ListView):
 
         context = super().get_context_data(**kwargs)
 
+        facets = self.get_facets()
+        self.filtered_and_sorted.set_facets(facets)
+
+        BestOfferService().attach(context['products'])
+        ProductPriceService().attach(context['products'])
+
         context['filter'] = self.filtered_and_sorted.form
+        context['facets'] = facets
+        context['keyset_pagination'] = self.is_keyset_pagination()
         context['tags'] = CatalogService.get_popular_tags()
         context['full_path'] = GetParamService(self.request.get_full_path()).remove_param('sorting').get_url()
 
         return context
 
 
+@method_decorator(condition(etag_func=lambda request, **kwargs: CatalogApiService.get_etag(request, kwargs.get('slug'))),
+                  name='get')
+class CatalogApiView(CatalogListView):
+    """
+    JSON API каталога с теми же фильтрами, сортировками и пагинацией, что и у CatalogListView.
+    Ответ содержит ETag, повторный запрос с If-None-Match получает 304 Not Modified.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.is_keyset_pagination():
+            return queryset.select_related('stats')
+
+        return queryset
+
+    def get_page_queryset(self) -> Product.objects:
+        return Product.objects.select_related('stats')
+
+    def get(self, request, *args, **kwargs) -> JsonResponse:
+        queryset = self.get_queryset()
+        paginator, page, products, is_paginated = self.paginate_queryset(queryset, self.paginate_by)
+
+        data = {
+            'count': paginator.count if paginator else None,
+            'next': None,
+            'previous': None,
+            'results': CatalogApiService().get_cards(request, list(products)),
+        }
+
+        url = GetParamService(request.get_full_path())
+        if self.is_keyset_pagination():
+            if page.has_next():
+                data['next'] = url.add_param('cursor', page.next_cursor).get_url()
+            if page.has_previous():
+                data['previous'] = url.add_param('cursor', page.previous_cursor).get_url()
+        else:
+            if page.has_next():
+                data['next'] = url.add_param('page', page.next_page_number()).get_url()
+            if page.has_previous():
+                data['previous'] = url.add_param('page', page.previous_page_number()).get_url()
+
+        return JsonResponse(data, json_dumps_params={'ensure_ascii': False})
+
+
 class ProductDetailView(DetailView):
     """
     Вьюшка детальной страницы товара
@@ -98,22 +209,22 @@ class ProductDetailView(DetailView):
     context_object_name = 'product'
 
     def get_object(self, *args, **kwargs) -> Product.objects:
-        slug = self.kwargs.get('slug')
-        instance = Product.objects.get(slug=slug)
-        product = cache.get_or_set(f'product-{slug}', instance, settings.get_cache_product_detail())
+        try:
+            self.payload = ProductDetailCache().get(self.kwargs.get('slug'))
+        except Product.DoesNotExist:
+            raise Http404
 
-        ProductsViewService(self.request).add_product_to_viewed(product.id)
+        product = self.payload['product']
+        RecentlyViewedService(self.request).add_product_to_viewed(product.id)
 
         return product
 
     def get_context_data(self, **kwargs) -> HttpResponse:
         context = super().get_context_data(**kwargs)
 
-        context['num_reviews'] = ReviewsProduct.get_number_of_reviews_for_product(self.object)
-        context['reviews_num3'], context['reviews_all'] = ReviewsProduct.get_list_of_product_reviews(self.object)
+        context.update(self.payload)
         context['form'] = ReviewsForm()
         context.update({'toast_message': cache.get('toast_message')})
-        context.update(ProductService(context['product']).get_context())
 
         return context
 
@@ -125,13 +236,67 @@ class ProductDetailView(DetailView):
         numbers = request.POST.get('amount')
         if numbers:
             cart = Cart(request)
-            product = get_object_or_404(Product, slug=kwargs['slug'])
-            offer = get_object_or_404(Offer, id=product.offers.first().id)
+            try:
+                product = ObjectCache(Product).get_by(slug=kwargs['slug'])
+            except Product.DoesNotExist:
+                raise Http404
+
+            best_offer = BestOfferService().get_best(product.id)
+            if best_offer is None:
+                raise Http404
+            offer = get_object_or_404(Offer.objects.select_related('product', 'seller'), id=best_offer['id'])
             cart.add_product(offer, quantity=int(numbers))
 
         return HttpResponseRedirect(request.META.get('HTTP_REFERER'))
 
 
+class ProductReviewsView(View):
+    """
+    Вьюшка отзывов товара в JSON с пагинацией по курсору, используется для подгрузки отзывов на странице товара
+    """
+
+    def get(self, request, *args, **kwargs) -> JsonResponse:
+        try:
+            product = ObjectCache(Product).get_by(slug=kwargs['slug'])
+        except Product.DoesNotExist:
+            raise Http404
+
+        page = ReviewsProduct.get_reviews_page(product, request.GET.get('cursor'))
+
+        next_url = None
+        if page.has_next():
+            next_url = GetParamService(request.get_full_path()).add_param('cursor', page.next_cursor).get_url()
+
+        return JsonResponse(
+            {
+                'results': [ReviewsProduct.get_review_data(review) for review in page],
+                'next': next_url,
+            },
+            json_dumps_params={'ensure_ascii': False},
+        )
+
+
+class ProductPriceHistoryView(View):
+    """
+    Вьюшка истории цены товара в JSON, используется для графика на странице товара.
+    Параметры: days - период в днях, points - количество точек ряда.
+    """
+
+    def get(self, request, *args, **kwargs) -> JsonResponse:
+        try:
+            product = ObjectCache(Product).get_by(slug=kwargs['slug'])
+        except Product.DoesNotExist:
+            raise Http404
+
+        try:
+            days = int(request.GET.get('days', 90))
+            points = int(request.GET.get('points', 60))
+        except ValueError:
+            days, points = 90, 60
+
+        return JsonResponse({'results': PriceHistoryService().get_series(product.id, days, points)})
+
+
 class SettingsView(PermissionRequiredMixin, ChangeListMixin, ListView):
     """
     Класс SettingsView отображает страницу с настройками
@@ -144,6 +309,7 @@ class SettingsView(PermissionRequiredMixin, ChangeListMixin, ListView):
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
         change_list = self.get_change_list_admin(title="Settings")
+        context['query_budget'] = QueryBudgetService().get_summary()
 
         return dict(list(context.items()) + list(change_list.items()))
 
@@ -220,7 +386,7 @@ class ClearCacheProductDetail(ChangeListMixin, TemplateView):
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        cache.delete("product_detail")
+        ProductDetailCache.invalidate_all()
         messages.success(self.request, _('кэш продукта очищен.'))
 
         return context
@@ -240,7 +406,7 @@ class ClearCacheSeller(ChangeListMixin, TemplateView):
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        cache.delete("seller")
+        ObjectCache.invalidate(Profile)
         messages.success(self.request, _('кэш продавца очищен.'))
 
         return context
@@ -252,6 +418,26 @@ class ClearCacheSeller(ChangeListMixin, TemplateView):
         return HttpResponseRedirect(reverse_lazy("store:settings"))
 
 
+class ClearQueryBudget(ChangeListMixin, TemplateView):
+    """
+    Класс ClearQueryBudget позволяет очистить сводку запросов к базе по вьюшкам
+    """
+
+    template_name = 'admin/settings.html'
+
+    def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        QueryBudgetService.clear()
+        messages.success(self.request, _('сводка запросов очищена.'))
+
+        return context
+
+    def dispatch(self, request, *args, **kwargs) -> HttpResponse:
+        super().dispatch(request, *args, **kwargs)
+
+        return HttpResponseRedirect(reverse_lazy("store:settings"))
+
+
 class ClearCacheCatalog(ChangeListMixin, TemplateView):
     """
     Класс ClearCacheCatalog позволяет очистить кэш детализации продуктов и параметров фильтра
@@ -261,8 +447,7 @@ class ClearCacheCatalog(ChangeListMixin, TemplateView):
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        cache.delete("get_params")
-        cache.delete("products")
+        CatalogCache.invalidate()
         messages.success(self.request, _('кэш каталога очищен.'))
 
         return context
@@ -424,10 +609,18 @@ class MainPage(ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        context['banners_category'] = BannersCategory.objects.all()[:3]
+        context['banners_category'] = BannersCategory.objects.select_related('category__price_stats')[:3]
         context['limited_deals'] = MainService.get_limited_deals()
-        context['hot_offers'] = Product.objects.all().filter(discount__is_active=True).distinct('pk')[:9]
-        context['limited_edition'] = Product.objects.filter(limited_edition=True).distinct('pk')[:16]
+        context['hot_offers'] = list(Product.objects.all().filter(discount__is_active=True).distinct('pk')[:9])
+        context['limited_edition'] = list(Product.objects.filter(limited_edition=True).distinct('pk')[:16])
+
+        # Цены всех карточек главной страницы загружаются одним запросом
+        ProductPriceService().attach([
+            context['limited_deals'],
+            *(context['object_list'] or []),
+            *context['hot_offers'],
+            *context['limited_edition'],
+        ])
 
         return context
 
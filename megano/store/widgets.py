@@ -1,7 +1,22 @@
 from django.forms import CheckboxSelectMultiple, RadioSelect
 
 
-class CustomCheckboxMultiple(CheckboxSelectMultiple):
+class FacetCountsMixin:
+    """
+    Добавляет к каждому варианту виджета количество товаров из фасетов каталога (option.count)
+    """
+
+    facet_counts = None
+
+    def create_option(self, name, value, label, selected, index, subindex=None, attrs=None):
+        option = super().create_option(name, value, label, selected, index, subindex, attrs)
+        if self.facet_counts is not None:
+            option['count'] = self.facet_counts.get(str(value), 0)
+
+        return option
+
+
+class CustomCheckboxMultiple(FacetCountsMixin, CheckboxSelectMultiple):
     """
     Переопределяет шаблон для CheckboxSelectMultiple
     """
@@ -9,7 +24,7 @@ class CustomCheckboxMultiple(CheckboxSelectMultiple):
     option_template_name = 'store/catalog/filter-template-for-checkbox-widgets.html'
 
 
-class CustomRadioSelect(RadioSelect):
+class CustomRadioSelect(FacetCountsMixin, RadioSelect):
     """
     Переопределяет шаблон для RadioSelect
     """